@@ -0,0 +1,38 @@
+"""
+Updates the cross-user region x season x soil cubes (see modules/regional.py).
+
+Only predictions newer than the stored watermark are read, so this is cheap to
+run often; wsgi.py also runs it every AGGREGATION_INTERVAL_SECONDS (default 300).
+
+Usage:
+    python aggregate_regions.py              # fold in new predictions
+    python aggregate_regions.py --rebuild    # recompute from the Prediction table
+"""
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate predictions into regional cubes")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="recompute from scratch (compacted predictions are no longer included)")
+    args = parser.parse_args()
+
+    from app import app, db, get_regional_aggregator
+
+    with app.app_context():
+        db.create_all()
+        aggregator = get_regional_aggregator()
+        start = time.perf_counter()
+        folded = aggregator.rebuild() if args.rebuild else aggregator.run(wait=True)
+        print(f"✅ Aggregated {folded} predictions in {time.perf_counter() - start:.2f}s "
+              f"(watermark: prediction id {aggregator.watermark()})")
+
+
+if __name__ == '__main__':
+    main()
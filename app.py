@@ -1,9 +1,19 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g, Response, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+import hashlib
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from modules.metrics import registry, span, start_request, record_request, get_request_stages
+from modules.profiling import RequestProfiler
+from modules.admission import JSON_ROUTES, AdmissionController
+from modules.passwords import PasswordHasher
+from modules.inference import encode_fields, top_k, predict_top_k
+from modules.fanout import Deferred, deadline_ms
+from modules.memory import MemoryManager, current_rss_bytes
+from modules.lazy import LazyResource
 
 # Import Custom Modules
 # (Moved into lazy getters to speed up startup)
@@ -18,118 +28,374 @@ app.config['SECRET_KEY'] = os.environ.get('SESSION_SECRET', 'crop-advisor-secret
 # ---------------- SQLite Setup ----------------
 db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'crop_advisor.db')
 os.makedirs(os.path.dirname(db_path), exist_ok=True)
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{db_path}')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
+# ---------------- Request Instrumentation ----------------
+request_profiler = RequestProfiler.from_env(os.path.dirname(os.path.abspath(__file__)))
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    start_request()
+    if request.url_rule:
+        g.profile = request_profiler.begin(request.url_rule.rule)
+
+# ---------------- Admission Control ----------------
+admission = AdmissionController.from_env()
+
+@app.before_request
+def admit_request():
+    admission.request_started()
+    g.admission_counted = True
+    if not request.url_rule:
+        return
+    route = request.url_rule.rule
+    user_key = session.get('user_id') or request.headers.get('X-Forwarded-For', request.remote_addr)
+    policy, rejection = admission.admit(route, request.method, user_key)
+    if policy:
+        g.admission = (route, policy)
+    elif rejection:
+        message = ("Too many requests, please wait a moment and try again." if rejection.status == 429
+                   else "The server is busy right now, please try again in a few seconds.")
+        headers = {'Retry-After': str(rejection.retry_after)}
+        if route in JSON_ROUTES or request.is_json or request.accept_mimetypes.best == 'application/json':
+            # The chat UI reads {'response': ...}; the other JSON routes report {'error': ...}
+            return jsonify({'response' if route == '/chatbot' else 'error': message}), rejection.status, headers
+        # Form posts get plain text
+        return message, rejection.status, headers
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_start' in g:
+        elapsed = time.perf_counter() - g.request_start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_request(route, request.method, response.status_code, elapsed)
+        if g.get('profile'):
+            request_profiler.end(g.pop('profile'), request.method, response.status_code, elapsed, get_request_stages())
+    return response
+
+@app.teardown_request
+def finish_request_profile(exc):
+    # Unhandled exceptions skip after_request; still release the sampler
+    if g.get('profile'):
+        elapsed = time.perf_counter() - g.request_start
+        request_profiler.end(g.pop('profile'), request.method, 500, elapsed, get_request_stages())
+
+@app.teardown_request
+def release_admission(exc):
+    if g.get('admission'):
+        admission.release(*g.pop('admission'))
+    if g.pop('admission_counted', False):
+        admission.request_finished()
+
+@app.route('/debug/profile', methods=['GET', 'POST'])
+def debug_profile():
+    """
+    Arms cProfile for the next N requests to a route (requires PROFILE_TOKEN).
+    POST route=/predictcrop&count=5 ; GET lists what is still armed.
+    """
+    token = os.environ.get('PROFILE_TOKEN')
+    if not token or request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or request.form
+        route = data.get('route', '')
+        if not any(rule.rule == route for rule in app.url_map.iter_rules()):
+            return jsonify({'error': f'Unknown route: {route}'}), 400
+        try:
+            count = max(1, min(100, int(data.get('count', 1))))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'count must be an integer'}), 400
+        return jsonify({'armed': request_profiler.arm(route, count), 'output_dir': request_profiler.output_dir})
+    return jsonify({'armed': request_profiler.armed(), 'slow_request_ms': request_profiler.slow_ms,
+                    'sample_rate': request_profiler.sample_rate})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint (set METRICS_TOKEN to require a bearer token)"""
+    token = os.environ.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return "Unauthorized", 401
+    registry.set_gauge('agri_memory_rss_bytes', current_rss_bytes())
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+# ---------------- Memory Budget ----------------
+# Components register themselves next to their getters below; wsgi.py starts the monitor
+memory_manager = MemoryManager.from_env()
+
+@app.route('/debug/memory')
+def debug_memory():
+    """Current RSS and per-component footprint (same METRICS_TOKEN as /metrics)"""
+    token = os.environ.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify(memory_manager.usage())
+
+# ---------------- Password Hashing ----------------
+password_hasher = PasswordHasher.from_env()
+
 # ---------------- Health Check ----------------
 @app.route('/health')
 def health_check():
     return "OK", 200
 
 # ---------------- Global Engine Holders ----------------
-_risk_engine = None
-_agri_bot = None
-_analytics_engine = None
+# Each heavy object loads once (single flight); failed loads are retried after LAZY_RETRY_SECONDS
+LAZY_RETRY_SECONDS = float(os.environ.get('LAZY_RETRY_SECONDS', 60))
+
+def _create_risk_engine():
+    from modules.weather import ClimateRiskEngine
+    engine = ClimateRiskEngine()
+    print("✅ Climate Risk Engine initialized")
+    return engine
+
+def _create_agri_bot():
+    from modules.chatbot import AgriBot
+    bot = AgriBot()
+    print("✅ AgriBot initialized")
+    return bot
+
+def _create_analytics_engine():
+    from modules.analytics import AnalyticsEngine
+    engine = AnalyticsEngine()
+    print("✅ Analytics Engine initialized")
+    return engine
+
+_risk_engine = LazyResource('risk_engine', _create_risk_engine, LAZY_RETRY_SECONDS)
+_agri_bot = LazyResource('agri_bot', _create_agri_bot, LAZY_RETRY_SECONDS)
+_analytics_engine = LazyResource('analytics_engine', _create_analytics_engine, LAZY_RETRY_SECONDS)
 
 def get_risk_engine():
-    global _risk_engine
-    if _risk_engine is None:
-        try:
-            from modules.weather import ClimateRiskEngine
-            _risk_engine = ClimateRiskEngine()
-            print("✅ Climate Risk Engine initialized")
-        except Exception as e:
-            print(f"⚠️ Climate Risk Engine failed: {e}")
-    return _risk_engine
+    return _risk_engine.get()
 
 def get_agri_bot():
-    global _agri_bot
-    if _agri_bot is None:
-        try:
-            from modules.chatbot import AgriBot
-            _agri_bot = AgriBot()
-            print("✅ AgriBot initialized")
-        except Exception as e:
-            print(f"⚠️ AgriBot failed: {e}")
-    return _agri_bot
+    return _agri_bot.get()
+
+def _unload_agri_bot_models():
+    bot = _agri_bot.peek()
+    if bot:
+        bot.unload_models()
+
+memory_manager.register('agribot_models', unload=_unload_agri_bot_models,
+                        is_loaded=lambda: bool(_agri_bot.peek() and _agri_bot.peek().models_loaded))
 
 def get_analytics_engine():
-    global _analytics_engine
-    if _analytics_engine is None:
-        try:
-            from modules.analytics import AnalyticsEngine
-            _analytics_engine = AnalyticsEngine()
-            print("✅ Analytics Engine initialized")
-        except Exception as e:
-            print(f"⚠️ Analytics Engine failed: {e}")
-    return _analytics_engine
+    return _analytics_engine.get()
 
 # ---------------- ML Model Getter ----------------
-_model_bundle = None
-_model_load_attempted = False
+def _load_model_bundle():
+    print("⏳ Loading ML Model (memory-efficient mode)...")
+    import joblib
+    import gc
 
-def get_model_bundle():
-    global _model_bundle, _model_load_attempted
-    
-    # If already loaded successfully, return it
-    if _model_bundle and isinstance(_model_bundle, dict) and 'model' in _model_bundle:
-        return _model_bundle
-    
-    # If we already tried and failed, return empty dict (prevents retry loop)
-    if _model_load_attempted and not _model_bundle:
-        print("⚠️ Model load was already attempted and failed")
-        return {}
-        
-    # Try to load
-    _model_load_attempted = True
+    model_path = os.path.join(os.path.dirname(__file__), 'models/crop_model.pkl')
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+
+    # Force garbage collection before loading
+    gc.collect()
+
+    # Load with memory mapping to reduce RAM usage
     try:
-        print("⏳ Loading ML Model (memory-efficient mode)...")
-        import joblib
-        import gc
-        
-        model_path = os.path.join(os.path.dirname(__file__), 'models/crop_model.pkl')
-        
-        if not os.path.exists(model_path):
-            print(f"❌ Model file not found: {model_path}")
-            return {}
-        
-        # Force garbage collection before loading
-        gc.collect()
-        
-        # Load with memory mapping to reduce RAM usage
-        _model_bundle = joblib.load(model_path, mmap_mode='r')
-        print("✅ ML Model loaded successfully (memory-mapped)")
-        return _model_bundle
-    except MemoryError as e:
-        print(f"❌ Out of memory loading model: {e}")
+        with memory_manager.loading('model_bundle'):
+            bundle = joblib.load(model_path, mmap_mode='r')
+    except MemoryError:
         print("💡 Render free tier may not have enough RAM for this model")
-        return {}
-    except Exception as e:
-        print(f"❌ Model load failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return {}
+        raise
+    if not isinstance(bundle, dict) or 'model' not in bundle:
+        raise ValueError("model bundle has no 'model' entry")
+    print("✅ ML Model loaded successfully (memory-mapped)")
+    return bundle
+
+# A failed model load is expensive, so it is retried less often than the other resources
+_model_bundle = LazyResource('model_bundle', _load_model_bundle,
+                             float(os.environ.get('MODEL_RETRY_SECONDS', 600)))
+
+def get_model_bundle():
+    """The model bundle, or {} while it can't be loaded."""
+    bundle = _model_bundle.get(default={})
+    if bundle:
+        memory_manager.touch('model_bundle')
+    return bundle
+
+def unload_model_bundle():
+    # Requests already holding the bundle keep it alive until they finish
+    _model_bundle.reset()
+
+memory_manager.register('model_bundle', unload=unload_model_bundle, is_loaded=lambda: _model_bundle.loaded)
+
+# ---------------- Fallback Predictor ----------------
+def _load_tiny_model():
+    from modules.tiny_model import TINY_MODEL_PATH, TinyCropModel
+    if not os.path.exists(TINY_MODEL_PATH):
+        print("⚠️ No distilled model (run distill_model.py against crop_model.pkl), using rule-based fallback")
+        return None
+    model = TinyCropModel.load()
+    if model.metadata.get('teacher') != 'crop_model.pkl':
+        print(f"⚠️ Ignoring {TINY_MODEL_PATH}: not distilled from crop_model.pkl")
+        return None
+    print(f"✅ Tiny fallback model loaded (top-1 agreement {model.metadata.get('top1_agreement', 'n/a')})")
+    return model
+
+_tiny_model = LazyResource('tiny_model', _load_tiny_model, float(os.environ.get('MODEL_RETRY_SECONDS', 600)))
+
+def get_tiny_model():
+    """Distilled model from distill_model.py (a few KB, no numpy/sklearn needed)."""
+    return _tiny_model.get()
+
+def predict_crops_fallback(n, p, k, temperature, humidity, ph, rainfall, soil_type, season, region):
+    """Top 3 crops when the full ML model is unavailable: tiny model first, then the rule engine."""
+    tiny_model = get_tiny_model()
+    if tiny_model:
+        with span('tiny_model'):
+            return tiny_model.predict_crops(n, p, k, temperature, humidity, ph, rainfall, soil_type, season, region)
+
+    from simple_predictor import predict_crops_simple
+    with span('simple_predictor'):
+        return predict_crops_simple(n, p, k, temperature, humidity, ph, rainfall, soil_type, season, region)
+
+def assess_climate_risk(location, region, rainfall, temperature, humidity):
+    """Drought/flood risk from the bundled climate normals (no network call on the request path)."""
+    risk_engine = get_risk_engine()
+    if risk_engine:
+        with span('climate_risk'):
+            return risk_engine.calculate_risk_scores(location, rainfall, temperature, region=region)
+    # Basic risk from the entered conditions (rounded to whole numbers)
+    return {
+        'drought_risk': round(max(0, min(100, (35 - temperature) * 3 + (100 - humidity) * 0.5))),
+        'flood_risk': round(max(0, min(100, rainfall / 20 + humidity * 0.3))),
+        'current_temp': temperature,
+        'current_humidity': humidity
+    }
+
+def rank_field(field):
+    """
+    Top 3 crops for one field from the inference server or the in-process bundle.
+    Returns (ranked, bundle); ranked is None when no ML model is available.
+    """
+    inference_client = get_inference_client()
+    if inference_client:
+        try:
+            with span('inference_server'):
+                return inference_client.predict([field])[0], None
+        except ConnectionError as e:
+            print(f"⚠️ Inference server unavailable, predicting in-process: {e}")
+
+    with span('model_bundle'):
+        bundle = get_model_bundle()
+    if not bundle or 'model' not in bundle:
+        return None, bundle
+    if not all(bundle.get(key) for key in ('model', 'le_soil', 'le_season', 'le_region', 'le_crop')):
+        raise ValueError("ML Model components are incomplete. Please try again later.")
+
+    # Build Model Features
+    with span('label_encode'):
+        features = encode_fields(bundle, [field])
+    with span('predict_proba'):
+        probabilities = bundle['model'].predict_proba(features)
+    return top_k(bundle, probabilities, 3)[0], bundle
+
+def predict_top3_batch(fields):
+    """
+    Top 3 crops for many fields at once: inference server, then the in-process
+    bundle (one vectorized predict_proba), then the fallback predictor per row.
+    """
+    inference_client = get_inference_client()
+    if inference_client:
+        try:
+            with span('inference_server'):
+                return inference_client.predict(fields)
+        except ConnectionError as e:
+            print(f"⚠️ Inference server unavailable, predicting in-process: {e}")
+    bundle = get_model_bundle()
+    if bundle and 'model' in bundle:
+        with span('predict_batch'):
+            return predict_top_k(bundle, fields, 3)
+    return [predict_crops_fallback(**field) for field in fields]
+
+def crop_probabilities(field, overrides):
+    """
+    (crop names, probability matrix) for `field` with each row's `overrides`
+    (variable -> column of values) applied, evaluated as one batch: inference
+    server, then the in-process bundle, then the fallback predictor per row
+    (which only scores each row's top 3 crops).
+    """
+    from modules.sweep import ALL_CROPS, expand_fields, probability_matrix, ranked_to_matrix
+    inference_client = get_inference_client()
+    if inference_client:
+        try:
+            with span('inference_server'):
+                return ranked_to_matrix(inference_client.predict(expand_fields(field, overrides), k=ALL_CROPS))
+        except ConnectionError as e:
+            print(f"⚠️ Inference server unavailable, predicting in-process: {e}")
+    bundle = get_model_bundle()
+    if bundle and 'model' in bundle:
+        with span('predict_batch'):
+            return probability_matrix(bundle, field, overrides)
+    with span('fallback_batch'):
+        return ranked_to_matrix([predict_crops_fallback(**row) for row in expand_fields(field, overrides)])
+
+# ---------------- Inference Server Client ----------------
+def _create_inference_client():
+    from modules.inference_server import InferenceClient
+    return InferenceClient(os.environ['INFERENCE_SOCKET'], timeout=float(os.environ.get('INFERENCE_TIMEOUT', 2)),
+                           row_timeout=float(os.environ.get('INFERENCE_ROW_TIMEOUT_MS', 2)) / 1000)
+
+_inference_client = LazyResource('inference_client', _create_inference_client, LAZY_RETRY_SECONDS)
+
+def get_inference_client():
+    """Client for modules/inference_server.py, or None when INFERENCE_SOCKET is unset."""
+    if not os.environ.get('INFERENCE_SOCKET'):
+        return None
+    return _inference_client.get()
 
 # ---------------- MongoDB Connection Getter ----------------
-_crop_collection = None
+def _connect_crop_collection():
+    from pymongo import MongoClient
+    mongo_uri = os.environ.get('MONGODB_URI', "mongodb://localhost:27017")
+    mongo_client = MongoClient(mongo_uri, serverSelectionTimeoutMS=2000)
+    try:
+        # Test connection
+        mongo_client.admin.command('ping')
+    except Exception:
+        mongo_client.close()
+        raise
+    print("✅ MongoDB connected!")
+    return mongo_client["agri_predictor_db"]["crops"]
+
+# While Mongo is down, requests use the bundled crop details instead of each waiting on the connect timeout
+_crop_collection = LazyResource('mongo_client', _connect_crop_collection, LAZY_RETRY_SECONDS)
 
 def get_crop_collection():
-    global _crop_collection
-    if _crop_collection is None:
-        try:
-            from pymongo import MongoClient
-            mongo_uri = os.environ.get('MONGODB_URI', "mongodb://localhost:27017")
-            mongo_client = MongoClient(mongo_uri, serverSelectionTimeoutMS=2000)
-            mongo_db = mongo_client["agri_predictor_db"]
-            _crop_collection = mongo_db["crops"]
-            # Test connection
-            mongo_client.admin.command('ping')
-            print("✅ MongoDB connected!")
-        except Exception as e:
-            print("⚠️ MongoDB connection error:", e)
-            _crop_collection = None
-    return _crop_collection
+    collection = _crop_collection.get()
+    if collection is not None:
+        memory_manager.touch('mongo_client')
+    return collection
+
+def close_crop_collection():
+    _crop_collection.reset(unload=lambda collection: collection.database.client.close())
+
+memory_manager.register('mongo_client', unload=close_crop_collection,
+                        is_loaded=lambda: _crop_collection.loaded)
+
+def find_crop_docs(names):
+    """Crop detail documents from Mongo keyed by name (one round trip for all names)."""
+    crop_col = get_crop_collection()
+    if crop_col is None:
+        return {}
+    return {doc['name']: doc for doc in crop_col.find({"name": {"$in": list(names)}})}
+
+_all_crop_names = None
+
+def all_crop_names():
+    """Every crop a prediction can name (catalog crops and the model's classes), for prefetching details."""
+    global _all_crop_names
+    if _all_crop_names is None:
+        from modules.training import load_encodings
+        _all_crop_names = sorted(set(get_crop_catalog().details) | set(load_encodings()['crops']))
+    return _all_crop_names
 
 # ---------------- SQLAlchemy Models ----------------
 class User(db.Model):
@@ -167,6 +433,42 @@ class Prediction(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (db.Index('ix_prediction_user_created', 'user_id', 'created_at'),)
+
+class PredictionSummary(db.Model):
+    """One row per user per day for predictions compacted by the retention job."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    predictions = db.Column(db.Integer, nullable=False, default=0)
+    recommendations = db.Column(db.Integer, nullable=False, default=0)
+    confidence1_sum = db.Column(db.Float, nullable=False, default=0)
+    drought_risk_max = db.Column(db.Float, default=0)
+    flood_risk_max = db.Column(db.Float, default=0)
+    # JSON: crop -> [times ranked 1st, 2nd, 3rd]
+    crop_ranks = db.Column(db.Text, nullable=False, default='{}')
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'day', name='uq_prediction_summary_user_day'),)
+
+class RegionAggregate(db.Model):
+    """Cross-user cube cell: all predictions for one region, season and soil type."""
+    id = db.Column(db.Integer, primary_key=True)
+    region = db.Column(db.String(50), nullable=False)
+    season = db.Column(db.String(50), nullable=False)
+    soil_type = db.Column(db.String(50), nullable=False)
+    predictions = db.Column(db.Integer, nullable=False, default=0)
+    drought_risk_sum = db.Column(db.Float, nullable=False, default=0)
+    flood_risk_sum = db.Column(db.Float, nullable=False, default=0)
+    # JSON: crop -> [times ranked 1st, 2nd, 3rd]
+    crop_ranks = db.Column(db.Text, nullable=False, default='{}')
+
+    __table_args__ = (db.UniqueConstraint('region', 'season', 'soil_type', name='uq_region_aggregate_cell'),)
+
+class AggregationState(db.Model):
+    """Watermark (last aggregated Prediction.id) of an incremental aggregation job."""
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+
 class Feedback(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -175,67 +477,203 @@ class Feedback(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.relationship('User', backref='feedbacks')
 
-# Initialize DB on first request instead of startup
+# Initialize DB at boot (see warm_up) with a first-request safety net
+_db_init_lock = threading.Lock()
+
 @app.before_request
 def init_db():
-    if not hasattr(app, 'db_initialized'):
+    if getattr(app, 'db_initialized', False):
+        return
+    # Health probes must stay cheap during a cold start
+    if request and request.endpoint in ('health_check', 'health'):
+        return
+    with _db_init_lock:
+        if getattr(app, 'db_initialized', False):
+            return
         try:
             db.create_all()
+            ensure_prediction_indexes()
             app.db_initialized = True
             print("✅ Database initialized")
         except Exception as e:
             print(f"⚠️ Initial DB setup skipped or failed: {e}")
 
-# Import numpy where needed
-def get_numpy():
-    import numpy as np
-    return np
-
-# ---------------- Local Crop Details (fallback) ----------------
-crop_details = {
-    'Rice': {'planting': 'June-July', 'fertilizer': 'Urea, DAP, MOP', 'irrigation': 'Flooded field method', 'yield': '4-6 tons/ha', 'image': 'rice.jpg'},
-    'Wheat': {'planting': 'October-November', 'fertilizer': 'NPK 20:20:20', 'irrigation': 'Sprinkler/Furrow', 'yield': '4-5 tons/ha', 'image': 'wheat.jpg'},
-    'Maize': {'planting': 'June-July or Feb-March', 'fertilizer': 'Urea, DAP', 'irrigation': 'Drip/Sprinkler', 'yield': '6-8 tons/ha', 'image': 'maize.jpg'},
-    'Millets': {'planting': 'June-August', 'fertilizer': 'NPK 10:10:10', 'irrigation': 'Moderate', 'yield': '2-4 tons/ha', 'image': 'millets.jpg'},
-    'Pulses': {'planting': 'July-August', 'fertilizer': 'DAP, Urea', 'irrigation': 'Low', 'yield': '1-2 tons/ha', 'image': 'pulses.jpg'},
-    'Cotton': {'planting': 'April-May', 'fertilizer': 'NPK 20:20:20', 'irrigation': 'Moderate', 'yield': '2-3 tons/ha', 'image': 'cotton.jpg'},
-    'Coffee': {'planting': 'June-August', 'fertilizer': 'NPK 10:5:20', 'irrigation': 'Drip/Sprinkler', 'yield': '1-2 tons/ha', 'image': 'coffee.jpg'},
-    'Jute': {'planting': 'March-May', 'fertilizer': 'N:P:K 2:1:1', 'irrigation': 'Rainfed/Flooded', 'yield': '2-3 tons/ha', 'image': 'jute.jpg'},
-    'Tea': {'planting': 'June-September', 'fertilizer': 'Ammonium Sulphate', 'irrigation': 'Sprinkler', 'yield': '2-3 tons/ha', 'image': 'tea.jpg'},
-    'Sugarcane': {'planting': 'Feb-March', 'fertilizer': '250:125:125 NPK kg/ha', 'irrigation': 'Furrow', 'yield': '80-100 tons/ha', 'image': 'sugarcane.jpg'},
-    'Tobacco': {'planting': 'August-October', 'fertilizer': 'NPK 50:50:50', 'irrigation': 'Furrow', 'yield': '2-3 tons/ha', 'image': 'tobacco.jpg'},
-    'Rubber': {'planting': 'June-July', 'fertilizer': 'NPK 10:10:4', 'irrigation': 'Rainfed', 'yield': '1-2 tons/ha', 'image': 'rubber.jpg'},
-    'Coconut': {'planting': 'May-June', 'fertilizer': 'NPK 500:320:1200g/palm', 'irrigation': 'Drip/Basin', 'yield': '80-100 nuts/palm', 'image': 'coconut.jpg'},
-    'Banana': {'planting': 'Feb-April', 'fertilizer': 'NPK 200:50:200g/plant', 'irrigation': 'Drip', 'yield': '30-40 tons/ha', 'image': 'banana.jpg'},
-    'Grapes': {'planting': 'Oct-Jan', 'fertilizer': 'FYM + NPK', 'irrigation': 'Drip', 'yield': '20-30 tons/ha', 'image': 'grapes.jpg'},
-    'Apple': {'planting': 'Jan-Feb', 'fertilizer': 'FYM + NPK', 'irrigation': 'Drip', 'yield': '10-15 tons/ha', 'image': 'apple.jpg'},
-    'Mango': {'planting': 'July-Aug', 'fertilizer': 'FYM + 1kg NPK/tree', 'irrigation': 'Basin', 'yield': '8-10 tons/ha', 'image': 'mango.jpg'},
-    'Muskmelon': {'planting': 'Feb-March', 'fertilizer': 'NPK 100:50:50', 'irrigation': 'Drip', 'yield': '15-20 tons/ha', 'image': 'muskmelon.jpg'},
-    'Watermelon': {'planting': 'Jan-March', 'fertilizer': 'NPK 100:50:50', 'irrigation': 'Drip', 'yield': '20-25 tons/ha', 'image': 'watermelon.jpg'},
-    'Orange': {'planting': 'July-Aug', 'fertilizer': 'NPK 600:200:300g/tree', 'irrigation': 'Drip/Basin', 'yield': '10-12 tons/ha', 'image': 'orange.jpg'},
-    'Papaya': {'planting': 'Feb-March or June-July', 'fertilizer': 'NPK 200:200:250g/plant', 'irrigation': 'Drip', 'yield': '30-40 tons/ha', 'image': 'papaya.jpg'},
-    'Pomegranate': {'planting': 'Feb-March', 'fertilizer': 'FYM + NPK', 'irrigation': 'Drip', 'yield': '10-12 tons/ha', 'image': 'pomegranate.jpg'},
-    'Lentil': {'planting': 'Oct-Nov', 'fertilizer': 'DAP + Sulphur', 'irrigation': 'Rainfed/Light', 'yield': '1-1.5 tons/ha', 'image': 'lentil.jpg'},
-    'Blackgram': {'planting': 'Feb-March or June-July', 'fertilizer': 'DAP', 'irrigation': 'Rainfed', 'yield': '0.8-1 tons/ha', 'image': 'blackgram.jpg'},
-    'Mungbean': {'planting': 'Feb-March or June-July', 'fertilizer': 'DAP', 'irrigation': 'Rainfed', 'yield': '0.8-1 tons/ha', 'image': 'mungbean.jpg'},
-    'Mothbeans': {'planting': 'June-July', 'fertilizer': 'FYM', 'irrigation': 'Rainfed', 'yield': '0.4-0.6 tons/ha', 'image': 'mothbeans.jpg'},
-    'Pigeonpeas': {'planting': 'June-July', 'fertilizer': 'DAP + FYM', 'irrigation': 'Rainfed', 'yield': '1.5-2 tons/ha', 'image': 'pigeonpeas.jpg'},
-    'Kidneybeans': {'planting': 'May-June', 'fertilizer': 'NPK 40:60:40', 'irrigation': 'Rainfed', 'yield': '1.0-1.5 tons/ha', 'image': 'kidneybeans.jpg'},
-    'Chickpea': {'planting': 'Oct-Nov', 'fertilizer': 'DAP', 'irrigation': 'Sprinkler', 'yield': '1.5-2 tons/ha', 'image': 'chickpea.jpg'}
-}
+# ---------------- Prediction Retention ----------------
+def get_prediction_retention():
+    from modules.retention import PredictionRetention
+    return PredictionRetention.from_env(db, Prediction, PredictionSummary, os.path.dirname(os.path.abspath(__file__)))
+
+def ensure_prediction_indexes():
+    # create_all() only adds indexes to new tables; older databases get them here
+    for index in Prediction.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+def run_retention_schedule(interval_hours):
+    """Runs the retention job every `interval_hours` (started by wsgi.py when configured)."""
+    while True:
+        time.sleep(interval_hours * 3600)
+        try:
+            with app.app_context():
+                db.create_all()
+                ensure_prediction_indexes()
+                # Rows must reach the regional cubes before they are compacted away
+                get_regional_aggregator().run(wait=True)
+                stats = get_prediction_retention().run()
+            if stats['skipped']:
+                print("⏳ Retention: another process is compacting, skipped this round")
+            else:
+                print(f"✅ Retention: compacted {stats['rows']} predictions in {stats['seconds']}s")
+        except Exception as e:
+            print(f"⚠️ Retention job failed: {e}")
+
+# ---------------- Regional Analytics ----------------
+_regional_cache = {}
+_REGIONAL_CACHE_SIZE = 128
+
+def get_regional_aggregator():
+    from modules.regional import RegionalAggregator
+    return RegionalAggregator.from_env(db, Prediction, RegionAggregate, AggregationState)
+
+def run_aggregation_schedule(interval_seconds):
+    """Folds new predictions into the regional cubes every `interval_seconds` (started by wsgi.py)."""
+    while True:
+        time.sleep(interval_seconds)
+        try:
+            with app.app_context():
+                folded = get_regional_aggregator().run()
+            if folded:
+                print(f"✅ Regional cubes: aggregated {folded} new predictions")
+        except Exception as e:
+            print(f"⚠️ Regional aggregation failed: {e}")
+
+memory_manager.register('regional_cache', unload=_regional_cache.clear,
+                        is_loaded=lambda: bool(_regional_cache), cache=True)
+
+# ---------------- Crop Catalog Getter ----------------
+def _build_crop_catalog():
+    from modules.catalog import CropCatalog
+    return CropCatalog(os.path.join(app.static_folder, 'images')).build()
+
+_crop_catalog = LazyResource('crop_catalog', _build_crop_catalog, LAZY_RETRY_SECONDS)
+
+def get_crop_catalog():
+    return _crop_catalog.get()
+
+# ---------------- Static Asset Manifest ----------------
+_asset_manifest = None
+
+def get_asset_manifest():
+    global _asset_manifest
+    if _asset_manifest is None:
+        from modules.assets import AssetManifest
+        _asset_manifest = AssetManifest(os.path.join(app.static_folder, 'dist'))
+    return _asset_manifest
+
+def asset_url(path):
+    """Fingerprinted URL for a css/js asset, or the raw /static file if not built."""
+    hashed = get_asset_manifest().asset_path(path)
+    if hashed:
+        return url_for('assets', filename=hashed)
+    return url_for('static', filename=path)
+
+def image_url(image, width, fmt='jpg'):
+    """URL of the crop photo variant closest to `width` px (None if no such variant)."""
+    path = get_asset_manifest().image_path(image, width, fmt)
+    if path:
+        return url_for('assets', filename=path)
+    return url_for('static', filename='images/' + image) if fmt == 'jpg' else None
+
+def image_srcset(image, fmt='jpg'):
+    return ', '.join(f"{url_for('assets', filename=path)} {width}w"
+                     for path, width in get_asset_manifest().image_srcset(image, fmt))
+
+@app.context_processor
+def asset_helpers():
+    return {'asset_url': asset_url, 'image_url': image_url, 'image_srcset': image_srcset}
+
+@app.route('/assets/<path:filename>')
+def assets(filename):
+    """Serves built assets with far-future caching and precompressed variants."""
+    served, encoding, mimetype = get_asset_manifest().negotiate(filename, request.headers.get('Accept-Encoding', ''))
+    response = send_from_directory(os.path.join(app.static_folder, 'dist'), served, mimetype=mimetype,
+                                   max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 # ---------------- Utility: Get Image File Case-Insensitive ----------------
 def get_image_filename(image_name):
-    folder = os.path.join(app.static_folder, 'images')
-    if not os.path.exists(folder):
-        return 'default.jpg'
-    base_name = image_name.lower()
-    if not base_name.endswith('.jpg'):
-        base_name += '.jpg'
-    for f in os.listdir(folder):
-        if f.lower() == base_name:
-            return f
-    return 'default.jpg'
+    return get_crop_catalog().get_image_filename(image_name)
+
+# ---------------- Boot-time Warm Up ----------------
+def warm_up():
+    """
+    Runs one-off boot work (DB schema, crop catalog, template compilation)
+    so the first real request doesn't pay for it. Safe to call from a background thread.
+    """
+    with app.app_context():
+        init_db()
+    get_crop_catalog()
+    get_asset_manifest()
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+    print("✅ Warm up complete")
+
+# ---------------- Utility: Dropdown Classes ----------------
+def get_form_classes(bundle):
+    """Returns (soil, season, region) choices for the prediction form."""
+    if bundle and 'le_soil' in bundle:
+        try:
+            return (bundle['le_soil'].classes_.tolist(),
+                    bundle['le_season'].classes_.tolist(),
+                    bundle['le_region'].classes_.tolist())
+        except Exception:
+            pass
+    inference_client = get_inference_client()
+    if inference_client:
+        try:
+            classes = inference_client.classes()
+            return classes['soil_types'], classes['seasons'], classes['regions']
+        except (ConnectionError, ValueError):
+            pass
+    # Fallback - MUST match the actual trained model classes
+    return (['Alluvial', 'Black', 'Clayey', 'Loamy', 'Red', 'Sandy'],
+            ['Kharif', 'Monsoon', 'Rabi', 'Summer', 'Winter', 'Whole Year'],
+            ['Central', 'East', 'Northeast', 'South', 'West'])
+
+def get_scoring_classes():
+    """
+    {'crops', 'soil_type', 'season', 'region'} lists of the backend that scores
+    batch requests: inference server, in-process bundle, tiny model, then the
+    rule-based predictor (its category lists are None: it accepts any value).
+    The amendment targets and the bulk category check both use them.
+    """
+    inference_client = get_inference_client()
+    if inference_client:
+        try:
+            classes = inference_client.classes()
+            if 'crops' not in classes:
+                # A server started before the crop list was part of the reply
+                from modules.training import load_encodings
+                classes = dict(classes, crops=load_encodings()['crops'])
+            return {'crops': classes['crops'], 'soil_type': classes['soil_types'],
+                    'season': classes['seasons'], 'region': classes['regions']}
+        except (ConnectionError, ValueError):
+            pass
+    bundle = get_model_bundle()
+    if bundle and 'model' in bundle:
+        return {'crops': sorted(str(c) for c in bundle['le_crop'].inverse_transform(bundle['model'].classes_)),
+                'soil_type': bundle['le_soil'].classes_.tolist(),
+                'season': bundle['le_season'].classes_.tolist(),
+                'region': bundle['le_region'].classes_.tolist()}
+    tiny_model = get_tiny_model()
+    if tiny_model:
+        return {'crops': sorted(tiny_model.crops), 'soil_type': tiny_model.soil_types,
+                'season': tiny_model.seasons, 'region': tiny_model.regions}
+    from simple_predictor import CROPS_DB
+    return {'crops': sorted(CROPS_DB), 'soil_type': None, 'season': None, 'region': None}
 
 # ---------------- Routes ----------------
 @app.route('/health')
@@ -259,7 +697,8 @@ def register():
             flash('Email already registered. Please login.', 'danger')
             return redirect(url_for('register'))
 
-        hashed_password = generate_password_hash(password)
+        with span('password_hash'):
+            hashed_password = password_hasher.hash(password)
         new_user = User(name=name, email=email, location=location, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
@@ -273,7 +712,14 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password, password):
+        with span('password_verify'):
+            valid = bool(user) and password_hasher.verify(user.password, password)
+        if valid:
+            # Transparently upgrade hashes made with older parameters
+            if password_hasher.needs_rehash(user.password):
+                with span('password_hash'):
+                    user.password = password_hasher.hash(password)
+                db.session.commit()
             session['user_id'] = user.id
             session['user_name'] = user.name
             flash(f'Welcome back, {user.name}!', 'success')
@@ -309,22 +755,30 @@ def predictcrop():
             season = request.form.get('season')
             region = request.form.get('region')
 
-            # Load Model Bundle (Lazy)
-            bundle = get_model_bundle()
+            field = {'n': n, 'p': p, 'k': k, 'temperature': temperature, 'humidity': humidity,
+                     'ph': ph, 'rainfall': rainfall, 'soil_type': soil_type, 'season': season, 'region': region}
+
+            # Inference and the details of every crop it could name (one $in query) run
+            # side by side; the ranked crops are then looked up in the prefetched documents
+            inference = Deferred('inference', rank_field, field)
+            crop_docs = Deferred('mongo_find', find_crop_docs, all_crop_names())
+            # Climate risk comes from the bundled normals, computed meanwhile on this thread
+            user_location = user.location if user and user.location else None
+            risk_data = assess_climate_risk(user_location, region, rainfall, temperature, humidity)
+            ranked, bundle = inference.result(deadline_ms('inference', 3000), default=(None, None), raise_errors=True)
             
-            # FALLBACK: Use simple predictor if ML model unavailable
-            if not bundle or 'model' not in bundle:
-                print("⚠️ ML Model unavailable, using rule-based fallback")
-                from simple_predictor import predict_crops_simple
-                
-                top_3_crops = predict_crops_simple(
+            # FALLBACK: Use simple predictor if ML model unavailable (or too slow)
+            if ranked is None:
+                print("⚠️ ML Model unavailable, using fallback predictor")
+                top_3_crops = predict_crops_fallback(
                     n, p, k, temperature, humidity, ph, rainfall,
                     soil_type, season, region
                 )
                 
                 # Add details for each crop
+                catalog = get_crop_catalog()
                 for crop in top_3_crops:
-                    details = crop_details.get(crop['name'], {
+                    details = catalog.get(crop['name'], {
                         'planting': 'Varies by region',
                         'fertilizer': 'NPK as per soil test',
                         'irrigation': 'Moderate',
@@ -334,14 +788,6 @@ def predictcrop():
                     crop.update(details)
                     crop['risk_adjusted_confidence'] = crop['confidence']
                 
-                # Calculate basic risk (rounded to whole numbers)
-                risk_data = {
-                    'drought_risk': round(max(0, min(100, (35 - temperature) * 3 + (100 - humidity) * 0.5))),
-                    'flood_risk': round(max(0, min(100, rainfall / 20 + humidity * 0.3))),
-                    'current_temp': temperature,
-                    'current_humidity': humidity
-                }
-                
                 # Save prediction
                 new_pred = Prediction(
                     user_id=session['user_id'], n=n, p=p, k=k,
@@ -354,88 +800,32 @@ def predictcrop():
                     drought_risk=risk_data['drought_risk'],
                     flood_risk=risk_data['flood_risk']
                 )
-                db.session.add(new_pred)
-                db.session.commit()
+                with span('sqlite_commit'):
+                    db.session.add(new_pred)
+                    db.session.commit()
                 
+                soil_classes, season_classes, region_classes = get_form_classes(bundle)
                 return render_template('predictcrop.html',
                                        predictions=top_3_crops,
                                        risk_data=risk_data,
                                        show_results=True,
+                                       field=field,
+                                       target_crops=get_scoring_classes()['crops'],
                                        soil_types=soil_classes,
                                        seasons=season_classes,
                                        regions=region_classes)
 
             # ORIGINAL ML MODEL PATH
-            model = bundle.get('model')
-            le_soil = bundle.get('le_soil')
-            le_season = bundle.get('le_season')
-            le_region = bundle.get('le_region')
-            le_crop = bundle.get('le_crop')
-            
-            if not all([model, le_soil, le_season, le_region, le_crop]):
-                flash("ML Model components are incomplete. Please try again later.", "danger")
-                return redirect(url_for('predictcrop'))
-
-            # Build Model Features
-            soil_encoded = le_soil.transform([soil_type])[0]
-            season_encoded = le_season.transform([season])[0]
-            region_encoded = le_region.transform([region])[0]
-
-            np = get_numpy()
-            features = np.array([[n, p, k, temperature, humidity, ph, rainfall,
-                                  soil_encoded, season_encoded, region_encoded]])
-
-            probabilities = model.predict_proba(features)[0]
-            top_3_indices = np.argsort(probabilities)[-3:][::-1]
+            # Fetch Details (Hybrid Mongo/Local), prefetched while inference ran
+            mongo_docs = crop_docs.result(deadline_ms('mongo', 500), default={})
 
             top_3_crops = []
-            crop_col = get_crop_collection()
-            
-            for idx in top_3_indices:
-                crop_name = le_crop.inverse_transform([idx])[0]
-                confidence = round(probabilities[idx] * 100, 2)
-
-                # Fetch Details (Hybrid Mongo/Local)
-                mongo_crop = None
-                if crop_col is not None:
-                    mongo_crop = crop_col.find_one({"name": crop_name})
-
-                if mongo_crop:
-                    details = {
-                        'planting': mongo_crop.get('planting', 'N/A'),
-                        'fertilizer': mongo_crop.get('fertilizer', 'N/A'),
-                        'irrigation': mongo_crop.get('irrigation', 'N/A'),
-                        'yield': mongo_crop.get('yield', 'N/A'),
-                        'image': get_image_filename(mongo_crop.get('image', 'default.jpg'))
-                    }
-                else:
-                    local_crop = crop_details.get(crop_name, {'image': 'default.jpg'})
-                    details = {
-                        'planting': local_crop.get('planting', 'N/A'),
-                        'fertilizer': local_crop.get('fertilizer', 'N/A'),
-                        'irrigation': local_crop.get('irrigation', 'N/A'),
-                        'yield': local_crop.get('yield', 'N/A'),
-                        'image': get_image_filename(local_crop.get('image', 'default.jpg'))
-                    }
-
-                top_3_crops.append({'name': crop_name, 'confidence': confidence, **details})
-
-            # --- New: Climate Risk Adjusted Recommendations ---
-            user_location = user.location if user and user.location else "Unknown"
-            risk_data = None
-            risk_engine = get_risk_engine()
-            if risk_engine:
-                risk_data = risk_engine.calculate_risk_scores(user_location, rainfall, temperature)
-            
-            # Add these fallbacks to ensure dictionary keys exist even if weather API fails
-            if not risk_data or 'drought_risk' not in risk_data:
-                risk_data = {
-                    'drought_risk': 20.0, # Safe default
-                    'flood_risk': 20.0,   # Safe default
-                    'current_temp': temperature,
-                    'current_humidity': humidity
-                }
-            
+            catalog = get_crop_catalog()
+            for ranked_crop in ranked:
+                crop_name = ranked_crop['name']
+                details = catalog.get_display_details(crop_name, mongo_docs.get(crop_name))
+                top_3_crops.append({'name': crop_name, 'confidence': ranked_crop['confidence'], **details})
+
             # Map adjusted confidence back to main confidence for display simplicity
             # Logic: We keep original ML confidence but store risk metrics
             # Or we can swap them. For now, let's keep ML strict but warn about risk.
@@ -457,73 +847,47 @@ def predictcrop():
                 drought_risk=risk_data['drought_risk'],
                 flood_risk=risk_data['flood_risk']
             )
-            db.session.add(new_pred)
-            db.session.commit()
+            with span('sqlite_commit'):
+                db.session.add(new_pred)
+                db.session.commit()
 
+            soil_classes, season_classes, region_classes = get_form_classes(bundle)
             return render_template('predictcrop.html',
                                    predictions=adjusted_crops,
                                    risk_data=risk_data,
                                    show_results=True,
-                                   soil_types=bundle['le_soil'].classes_,
-                                   seasons=bundle['le_season'].classes_,
-                                   regions=bundle['le_region'].classes_)
+                                   field=field,
+                                   target_crops=get_scoring_classes()['crops'],
+                                   soil_types=soil_classes,
+                                   seasons=season_classes,
+                                   regions=region_classes)
         except Exception as e:
             flash(f'Error: {str(e)}', 'danger')
             return redirect(url_for('predictcrop'))
 
     # GET Request - Check for last prediction
-    last_pred = Prediction.query.filter_by(user_id=session['user_id']).order_by(Prediction.created_at.desc()).first()
+    with span('sqlite_query'):
+        last_pred = Prediction.query.filter_by(user_id=session['user_id']).order_by(Prediction.created_at.desc()).first()
     
     saved_predictions = None
     saved_risk_data = None
+    saved_field = None
     show_saved = False
 
-    # Get model classes for dropdowns (Lazy)
-    # Get model classes for dropdowns (Lazy)
-    bundle = get_model_bundle()
-    if bundle and 'le_soil' in bundle:
-        try:
-            soil_classes = bundle['le_soil'].classes_.tolist()
-            season_classes = bundle['le_season'].classes_.tolist()
-            region_classes = bundle['le_region'].classes_.tolist()
-        except:
-             # Fallback - MUST match the actual trained model classes
-            soil_classes = ['Alluvial', 'Black', 'Clayey', 'Loamy', 'Red', 'Sandy']
-            season_classes = ['Kharif', 'Monsoon', 'Rabi', 'Summer', 'Winter', 'Whole Year']
-            region_classes = ['Central', 'East', 'Northeast', 'South', 'West']
-    else:
-        # Absolute fallback - MUST match the actual trained model classes
-        soil_classes = ['Alluvial', 'Black', 'Clayey', 'Loamy', 'Red', 'Sandy']
-        season_classes = ['Kharif', 'Monsoon', 'Rabi', 'Summer', 'Winter', 'Whole Year']
-        region_classes = ['Central', 'East', 'Northeast', 'South', 'West']
+    # Get model classes for dropdowns (Lazy; from the inference server when configured)
+    bundle = None if get_inference_client() else get_model_bundle()
+    soil_classes, season_classes, region_classes = get_form_classes(bundle)
 
     if last_pred:
         # Reconstruct crop objects for display
         saved_predictions = []
+        # Fetch details again for display
+        names = [getattr(last_pred, f'crop{i}') for i in range(1, 4)]
+        mongo_docs = Deferred('mongo_find', find_crop_docs, names).result(deadline_ms('mongo', 500), default={})
         for i in range(1, 4):
             c_name = getattr(last_pred, f'crop{i}')
             c_conf = getattr(last_pred, f'confidence{i}')
-            
-            # Fetch details again for display
-            details = crop_details.get(c_name, {'image': 'default.jpg'})
-            crop_col = get_crop_collection()
-            if crop_col is not None:
-                mongo_crop = crop_col.find_one({"name": c_name})
-                if mongo_crop:
-                     details = {
-                        'planting': mongo_crop.get('planting', 'N/A'),
-                        'fertilizer': mongo_crop.get('fertilizer', 'N/A'),
-                        'irrigation': mongo_crop.get('irrigation', 'N/A'),
-                        'yield': mongo_crop.get('yield', 'N/A'),
-                        'image': get_image_filename(mongo_crop.get('image', 'default.jpg'))
-                    }
-            
-            # Ensure local fallback keys if mongo fails or keys exist
-            if 'planting' not in details: details['planting'] = 'N/A'
-            if 'fertilizer' not in details: details['fertilizer'] = 'N/A'
-            if 'yield' not in details: details['yield'] = 'N/A'
-            if 'irrigation' not in details: details['irrigation'] = 'N/A'
-            if 'image' not in details: details['image'] = get_image_filename('default.jpg')
+            details = get_crop_catalog().get_display_details(c_name, mongo_docs.get(c_name))
 
             saved_predictions.append({'name': c_name, 'confidence': c_conf, **details})
         
@@ -531,16 +895,125 @@ def predictcrop():
             'drought_risk': last_pred.drought_risk,
             'flood_risk': last_pred.flood_risk
         }
+        saved_field = {name: getattr(last_pred, name) for name in
+                       ('n', 'p', 'k', 'temperature', 'humidity', 'ph', 'rainfall', 'soil_type', 'season', 'region')}
         show_saved = True
 
     return render_template('predictcrop.html', 
                            predictions=saved_predictions, 
                            risk_data=saved_risk_data,
                            show_results=show_saved,
+                           field=saved_field,
+                           target_crops=get_scoring_classes()['crops'],
                            soil_types=soil_classes,
                            seasons=season_classes,
                            regions=region_classes)
 
+# ----------------- Bulk CSV Predictions -----------------
+@app.route('/predictcrop/bulk', methods=['POST'])
+def predictcrop_bulk():
+    """
+    Streams back the uploaded soil-test CSV annotated with top-3 crops and risk.
+    Rows are predicted in vectorized chunks; malformed rows and categories the
+    model doesn't know get an inline error.
+    """
+    if 'user_id' not in session:
+        flash('Please login to access crop prediction.', 'warning')
+        return redirect(url_for('login'))
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Please choose a CSV file to upload.', 'danger')
+        return redirect(url_for('predictcrop'))
+
+    from modules.bulk import annotate_csv
+    chunk_rows = int(os.environ.get('BULK_CHUNK_ROWS', 1000))
+    download_name = os.path.splitext(os.path.basename(upload.filename))[0] or 'fields'
+    return Response(
+        stream_with_context(annotate_csv(upload.stream, predict_top3_batch, chunk_rows, get_scoring_classes())),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{download_name}_predictions.csv"'}
+    )
+
+# ----------------- What-if Sweeps -----------------
+_sweep_cache = {}
+_SWEEP_CACHE_SIZE = 64
+
+memory_manager.register('sweep_cache', unload=_sweep_cache.clear,
+                        is_loaded=lambda: bool(_sweep_cache), cache=True)
+
+@app.route('/predictcrop/sweep', methods=['POST'])
+def predictcrop_sweep():
+    """
+    Crop suitability over a grid of one or two inputs around a base field.
+    Body: {"field": {...}, "axes": [{"variable": "n", "min": 0, "max": 150, "steps": 16},
+                                     {"variable": "rainfall", "change_pct": [-30, 30], "steps": 13}],
+           "crops": ["Rice"], "top": 8}
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    from modules.sweep import parse_field, parse_axes, grid_overrides, summarize
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'body must be a JSON object'}), 400
+    try:
+        field = parse_field(data.get('field') or {})
+        axes = parse_axes(field, data.get('axes'), int(os.environ.get('SWEEP_MAX_POINTS', 2500)))
+        top = max(1, min(int(data.get('top', 8)), 30))
+        include = tuple(sorted(str(c) for c in data.get('crops') or ()))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    backend = 'server' if get_inference_client() else ('model' if get_model_bundle() else 'fallback')
+    key = (backend, tuple(sorted(field.items())), tuple((name, tuple(values)) for name, values in axes), top, include)
+    result = _sweep_cache.get(key)
+    if result is None:
+        try:
+            crops, probabilities = crop_probabilities(field, grid_overrides(axes))
+        except ValueError as e:
+            # Unknown soil type / season / region
+            return jsonify({'error': str(e)}), 400
+        with span('sweep_summary'):
+            result = summarize(axes, crops, probabilities, top, include)
+        result['backend'] = backend
+        if len(_sweep_cache) >= _SWEEP_CACHE_SIZE:
+            _sweep_cache.pop(next(iter(_sweep_cache)), None)
+        _sweep_cache[key] = result
+    return jsonify(result)
+
+# ----------------- Amendment Search -----------------
+@app.route('/predictcrop/amend', methods=['POST'])
+def predictcrop_amend():
+    """
+    Cheapest N/P/K/pH change that brings a target crop into the top 3.
+    Body: {"field": {...}, "target": "Rice", "min_confidence": 20}
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    from modules.sweep import parse_field
+    from modules.amendment import AmendmentOptimizer
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'body must be a JSON object'}), 400
+    try:
+        field = parse_field(data.get('field') or {})
+        target = str(data.get('target') or '')
+        min_confidence = max(1.0, min(float(data.get('min_confidence', 20)), 100.0))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    if target not in get_scoring_classes()['crops']:
+        return jsonify({'error': f"unknown crop: {target}"}), 400
+    try:
+        with span('amendment_search'):
+            result = AmendmentOptimizer.from_env(crop_probabilities).optimize(field, target, min_confidence)
+    except ValueError as e:
+        # Unknown soil type / season / region
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
 # ----------------- New AI Assistant Route -----------------
 @app.route('/chatbot', methods=['GET', 'POST'])
 def chatbot():
@@ -555,7 +1028,12 @@ def chatbot():
         try:
             bot = get_agri_bot()
             if bot:
-                response = bot.get_answer(user_query)
+                if not bot.models_loaded:
+                    with span('agribot_load'), memory_manager.loading('agribot_models'):
+                        bot._load_models()
+                memory_manager.touch('agribot_models')
+                with span('agribot'):
+                    response = bot.get_answer(user_query)
             else:
                 response = "I'm currently warming up my AI systems. Please try again in a minute!"
         except Exception as e:
@@ -567,20 +1045,41 @@ def chatbot():
     return render_template('chatbot.html')
 
 # ----------------- New Analytics Route -----------------
-@app.route('/dashboard')
-def dashboard():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
+# The dashboard is an HTML shell; each panel loads its data from /dashboard/data/<panel>.
+DASHBOARD_PANELS = ('summary', 'dist', 'trend', 'comparison')
+DASHBOARD_HISTORY_ROWS = 100
+_DASHBOARD_CACHE_SIZE = 256
+_dashboard_cache = {}
+_dashboard_locks = {}
+_dashboard_lock = threading.Lock()
 
-    user_preds = Prediction.query.filter_by(user_id=session['user_id']).all()
+def get_dashboard_version(user_id):
+    """
+    Changes whenever the user's dashboard data can change: a new prediction, or
+    the retention job folding rows into a new or an existing summary day (the
+    summaries' prediction total only grows). Two indexed lookups, no row loading.
+    """
+    latest = (db.session.query(Prediction.id).filter_by(user_id=user_id)
+              .order_by(Prediction.created_at.desc()).first())
+    summary_days, summarized = (db.session.query(db.func.count(PredictionSummary.id),
+                                                 db.func.coalesce(db.func.sum(PredictionSummary.predictions), 0))
+                                .filter_by(user_id=user_id).one())
+    return f"{latest.id if latest else 0}-{summary_days}-{summarized}"
+
+def build_dashboard_data(user_id):
+    with span('sqlite_query'):
+        user_preds = Prediction.query.filter_by(user_id=user_id).order_by(Prediction.created_at).all()
+        # Older predictions live on as daily summaries once the retention job has compacted them
+        summaries = PredictionSummary.query.filter_by(user_id=user_id).order_by(PredictionSummary.day).all()
     
     # Process analytics
     dist_data = trend_data = comparison_data = []
     engine = get_analytics_engine()
     if engine:
-        dist_data = engine.process_prediction_history(user_preds)
-        trend_data = engine.get_trend_data(user_preds)
-        comparison_data = engine.get_crop_comparison_data(user_preds)
+        with span('analytics'):
+            dist_data = engine.process_prediction_history(user_preds, summaries)
+            trend_data = engine.get_trend_data(user_preds, summaries)
+            comparison_data = engine.get_crop_comparison_data(user_preds, summaries)
     
     # Calculate Dashboard Stats
     avg_confidence = 0
@@ -588,17 +1087,20 @@ def dashboard():
     risk_class = "text-muted"
     total_recommendations = 0
 
-    if user_preds:
+    if user_preds or summaries:
         # 1. Total Recommendations (count all top 3 crops from all predictions)
         for p in user_preds:
             if p.crop1: total_recommendations += 1
             if p.crop2: total_recommendations += 1
             if p.crop3: total_recommendations += 1
+        total_recommendations += sum(s.recommendations for s in summaries)
         
         # 2. Average Confidence
-        total_conf = sum([p.confidence1 for p in user_preds])
-        avg_confidence = round(total_conf / len(user_preds))
+        total_conf = sum([p.confidence1 for p in user_preds]) + sum(s.confidence1_sum for s in summaries)
+        total_preds = len(user_preds) + sum(s.predictions for s in summaries)
+        avg_confidence = round(total_conf / total_preds) if total_preds else 0
 
+    if user_preds:
         # 3. Risk Level (based on latest prediction's highest risk factor)
         latest_pred = user_preds[-1] # Last item is the most recent
         current_risk = max(latest_pred.drought_risk or 0, latest_pred.flood_risk or 0)
@@ -612,16 +1114,115 @@ def dashboard():
         else:
             risk_level = "HIGH"
             risk_class = "text-danger"
-    
-    return render_template('dashboard.html', 
-                          predictions=user_preds[::-1],
-                          total_recommendations=total_recommendations,
-                          avg_confidence=avg_confidence,
-                          risk_level=risk_level,
-                          risk_class=risk_class,
-                          dist_data=dist_data,
-                          trend_data=trend_data,
-                          comparison_data=comparison_data)
+
+    history = [{
+        'date': p.created_at.strftime('%b %d, %Y') if p.created_at else 'N/A',
+        'n': int(p.n), 'p': int(p.p), 'k': int(p.k),
+        'crop1': p.crop1,
+        'confidence1': p.confidence1,
+        'drought_risk': round(p.drought_risk or 0, 1),
+        'flood_risk': round(p.flood_risk or 0, 1),
+    } for p in user_preds[::-1][:DASHBOARD_HISTORY_ROWS]]
+
+    return {
+        'summary': {
+            'total_recommendations': total_recommendations,
+            'primary_suggestion': user_preds[-1].crop1 if user_preds else None,
+            'avg_confidence': avg_confidence,
+            'risk_level': risk_level,
+            'risk_class': risk_class,
+            'history': history,
+        },
+        'dist': dist_data,
+        'trend': trend_data,
+        'comparison': comparison_data,
+    }
+
+def clear_dashboard_cache():
+    with _dashboard_lock:
+        _dashboard_cache.clear()
+
+memory_manager.register('dashboard_cache', unload=clear_dashboard_cache,
+                        is_loaded=lambda: bool(_dashboard_cache), cache=True)
+
+def get_dashboard_data(user_id, version):
+    """Builds all panels once per (user, version), even when they are requested in parallel."""
+    key = (user_id, version)
+    with _dashboard_lock:
+        if key in _dashboard_cache:
+            return _dashboard_cache[key]
+        key_lock = _dashboard_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        with _dashboard_lock:
+            if key in _dashboard_cache:
+                return _dashboard_cache[key]
+        data = build_dashboard_data(user_id)
+        with _dashboard_lock:
+            if len(_dashboard_cache) >= _DASHBOARD_CACHE_SIZE:
+                _dashboard_cache.pop(next(iter(_dashboard_cache)))
+            _dashboard_cache[key] = data
+            _dashboard_locks.pop(key, None)
+    return data
+
+@app.route('/dashboard')
+def dashboard():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+
+    # The shell holds no user data beyond the name, so it revalidates to a 304
+    response = app.make_response(render_template('dashboard.html'))
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+@app.route('/dashboard/data/<panel>')
+def dashboard_data(panel):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if panel not in DASHBOARD_PANELS:
+        return jsonify({'error': f'Unknown panel: {panel}'}), 404
+
+    user_id = session['user_id']
+    with span('dashboard_version'):
+        version = get_dashboard_version(user_id)
+    etag = f"{panel}-{user_id}-{version}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(get_dashboard_data(user_id, version)[panel])
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/analytics/regional')
+def regional_analytics():
+    """
+    Cross-user region x season view from the precomputed cubes.
+    Filters: ?region=South&season=Kharif&soil_type=Loamy (each repeatable).
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    filters = tuple(tuple(sorted(request.args.getlist(name))) for name in ('region', 'season', 'soil_type'))
+    aggregator = get_regional_aggregator()
+    with span('sqlite_query'):
+        watermark = aggregator.watermark()
+    etag = f"regional-{watermark}-{hashlib.md5(repr(filters).encode()).hexdigest()[:12]}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        key = (watermark, filters)
+        data = _regional_cache.get(key)
+        if data is None:
+            with span('regional_query'):
+                data = aggregator.query(*(list(values) or None for values in filters))
+            if len(_regional_cache) >= _REGIONAL_CACHE_SIZE:
+                _regional_cache.pop(next(iter(_regional_cache)), None)
+            _regional_cache[key] = data
+        response = jsonify(data)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/review', methods=['GET', 'POST'])
 def review():
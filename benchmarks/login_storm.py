@@ -0,0 +1,88 @@
+"""
+Shows /predictcrop latency while a burst of logins runs, with password hashing
+inline (old behaviour) versus in the process pool.
+
+Usage:
+    python -m benchmarks.login_storm
+    python -m benchmarks.login_storm --storm-threads 6 --hash-workers 2 --method pbkdf2:sha256:600000
+"""
+import argparse
+import contextlib
+import io
+import threading
+
+from benchmarks.run import (BENCH_EMAIL, BENCH_PASSWORD, PREDICT_FORM, BenchmarkEnvironment,
+                            parse_latency, run_scenario)
+
+
+def login_storm(app, stop, counter, lock):
+    client = app.test_client()
+    while not stop.is_set():
+        client.post('/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+        with lock:
+            counter[0] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict latency during login storms")
+    parser.add_argument('--requests', type=int, default=100, help="predict requests per phase")
+    parser.add_argument('--concurrency', type=int, default=2, help="predict client threads")
+    parser.add_argument('--storm-threads', type=int, default=6, help="threads logging in continuously")
+    parser.add_argument('--hash-workers', type=int, default=2, help="process pool size for the pool mode")
+    parser.add_argument('--method', default=None, help="werkzeug hash method (default: PASSWORD_HASH_METHOD)")
+    parser.add_argument('--latency', default='weather=0,mongo=0,llm=0')
+    args = parser.parse_args()
+
+    from modules.passwords import PasswordHasher
+    from modules.training import build_model_bundle
+
+    rows = []
+    with BenchmarkEnvironment(parse_latency(args.latency)) as env:
+        app_module = env.app_module
+        with contextlib.redirect_stdout(io.StringIO()):
+            env.use_ml_model(build_model_bundle())
+
+        method = args.method or PasswordHasher.from_env().method
+        for mode, workers in (('inline', 0), ('pool', args.hash_workers)):
+            hasher = PasswordHasher(method=method, workers=workers)
+            app_module.password_hasher = hasher
+            with contextlib.redirect_stdout(io.StringIO()):
+                if mode == 'inline':
+                    env.create_user(BENCH_EMAIL)
+                hasher.hash('warm-up')  # start pool processes outside the measurement
+
+            def predict(client):
+                r = client.post('/predictcrop', data=PREDICT_FORM)
+                return r.status_code == 200
+
+            def make_client():
+                return env.logged_in_client(BENCH_EMAIL)
+
+            for phase in ('quiet', 'storm'):
+                stop = threading.Event()
+                counter, lock = [0], threading.Lock()
+                storm = []
+                if phase == 'storm':
+                    storm = [threading.Thread(target=login_storm, args=(app_module.app, stop, counter, lock), daemon=True)
+                             for _ in range(args.storm_threads)]
+                    for t in storm:
+                        t.start()
+                print(f"⏳ {mode} / {phase}...", flush=True)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = run_scenario(f'{mode}_{phase}', make_client, predict, args.requests, args.concurrency)
+                stop.set()
+                for t in storm:
+                    t.join()
+                rows.append((mode, phase, result, counter[0]))
+            hasher.shutdown()
+
+    print(f"\nhash method: {method}")
+    print(f"\n{'hashing':<8} {'phase':<6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'logins':>7}")
+    print("-" * 62)
+    for mode, phase, r, logins in rows:
+        print(f"{mode:<8} {phase:<6} {r['throughput_rps']:>8.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {logins:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""
+Model candidate benchmark: accuracy vs latency vs memory.
+
+Cross-validates candidate classifiers on models/crop.csv.csv (folds run in
+parallel) and, for each candidate, reports top-1/top-3 accuracy, single-row and
+batch inference latency, artifact size, load time and peak RSS. The rule-based
+simple_predictor.predict_crops_simple is included as the baseline.
+
+Usage:
+    python -m benchmarks.models
+    python -m benchmarks.models --folds 5 --jobs 4 --only random_forest,extra_trees
+    python -m benchmarks.models --csv benchmarks/results/models.csv
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+BATCH_ROWS = 1000
+SINGLE_ROW_REPEATS = 200
+
+COLUMNS = ['candidate', 'top1_accuracy', 'top3_accuracy', 'single_row_ms', 'batch_1000_ms',
+           'artifact_kb', 'load_ms', 'peak_rss_mb', 'rss_delta_mb']
+
+
+def make_candidates():
+    from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import GaussianNB
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.tree import DecisionTreeClassifier
+
+    return {
+        'random_forest': lambda: RandomForestClassifier(n_estimators=100, random_state=42),
+        'random_forest_small': lambda: RandomForestClassifier(n_estimators=30, max_depth=12, random_state=42),
+        'extra_trees': lambda: ExtraTreesClassifier(n_estimators=100, random_state=42),
+        'hist_gradient_boosting': lambda: HistGradientBoostingClassifier(max_iter=100, random_state=42),
+        'decision_tree': lambda: DecisionTreeClassifier(max_depth=12, random_state=42),
+        'knn': lambda: make_pipeline(StandardScaler(), KNeighborsClassifier(n_neighbors=7)),
+        'logistic_regression': lambda: make_pipeline(StandardScaler(), LogisticRegression(max_iter=2000)),
+        'gaussian_nb': lambda: GaussianNB(),
+    }
+
+
+def top_k_accuracy(probabilities, y_true, k):
+    import numpy as np
+
+    top = np.argsort(probabilities, axis=1)[:, -k:]
+    return float(np.mean([y in row for y, row in zip(y_true, top)]))
+
+
+def run_fold(name, factory, X, y, train_idx, test_idx, n_classes):
+    """Fits one fold and returns full-width class probabilities for the test rows."""
+    import numpy as np
+
+    model = factory()
+    model.fit(X[train_idx], y[train_idx])
+    proba = np.zeros((len(test_idx), n_classes))
+    proba[:, model.classes_] = model.predict_proba(X[test_idx])
+    return name, test_idx, proba
+
+
+def measure_latency(model, X):
+    import numpy as np
+
+    single = X[:1]
+    model.predict_proba(single)  # warm up
+    timings = []
+    for i in range(SINGLE_ROW_REPEATS):
+        row = X[i % len(X):i % len(X) + 1]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    batch = X[np.arange(BATCH_ROWS) % len(X)]
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    batch_ms = (time.perf_counter() - start) * 1000
+    return float(np.median(timings)), batch_ms
+
+
+# Runs in a fresh interpreter so load time and RSS aren't polluted by training
+LOAD_PROBE = r"""
+import json, resource, sys, time
+import joblib, numpy
+# Pre-import estimator modules so the delta reflects the model, not sklearn imports
+import sklearn.ensemble, sklearn.linear_model, sklearn.naive_bayes, sklearn.neighbors, sklearn.pipeline, sklearn.tree
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+before = rss_mb()
+start = time.perf_counter()
+bundle = joblib.load(sys.argv[1])
+load_ms = (time.perf_counter() - start) * 1000
+bundle['model'].predict_proba(numpy.load(sys.argv[2]))
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({'load_ms': load_ms, 'peak_rss_mb': peak, 'rss_delta_mb': peak - before}))
+"""
+
+
+def measure_artifact(bundle, X):
+    import joblib
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = os.path.join(tmp, 'bundle.pkl')
+        joblib.dump(bundle, artifact)
+        batch = os.path.join(tmp, 'batch.npy')
+        np.save(batch, X[np.arange(BATCH_ROWS) % len(X)])
+        size_kb = os.path.getsize(artifact) / 1024
+        probe = subprocess.run([sys.executable, '-c', LOAD_PROBE, artifact, batch],
+                               capture_output=True, text=True, cwd=BASE_DIR)
+        stats = json.loads(probe.stdout) if probe.returncode == 0 else {}
+    return size_kb, stats
+
+
+def benchmark_simple_predictor(df):
+    """Scores the rule-based fallback on the full dataset (it has nothing to train)."""
+    import importlib
+
+    start = time.perf_counter()
+    simple_predictor = importlib.import_module('simple_predictor')
+    load_ms = (time.perf_counter() - start) * 1000
+
+    def predict(row):
+        return simple_predictor.predict_crops_simple(
+            row.N, row.P, row.K, row.temperature, row.humidity, row.ph, row.rainfall,
+            row.soil_type, row.season, row.region)
+
+    rows = list(df.itertuples(index=False))
+    top1 = top3 = 0
+    for row in rows:
+        names = [c['name'] for c in predict(row)]
+        top1 += names[0] == row.label
+        top3 += row.label in names
+
+    timings = []
+    for row in rows[:SINGLE_ROW_REPEATS]:
+        start = time.perf_counter()
+        predict(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    for i in range(BATCH_ROWS):
+        predict(rows[i % len(rows)])
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'candidate': 'simple_predictor (baseline)',
+        'top1_accuracy': round(top1 / len(rows), 4),
+        'top3_accuracy': round(top3 / len(rows), 4),
+        'single_row_ms': round(sorted(timings)[len(timings) // 2], 4),
+        'batch_1000_ms': round(batch_ms, 2),
+        'artifact_kb': round(os.path.getsize(os.path.join(BASE_DIR, 'simple_predictor.py')) / 1024, 1),
+        'load_ms': round(load_ms, 2),
+        'peak_rss_mb': None,
+        'rss_delta_mb': None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crop model candidates")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel CV jobs (joblib n_jobs)")
+    parser.add_argument('--only', default='', help="comma-separated candidate names")
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'models.json'))
+    parser.add_argument('--csv', default=None, help="also write the table as CSV")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    import numpy as np
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import StratifiedKFold
+
+    from modules.training import build_model_bundle, encode_features, load_crop_dataset
+
+    df = load_crop_dataset()
+    reference = build_model_bundle(df, model=make_candidates()['decision_tree']())
+    X = encode_features(df, reference['le_soil'], reference['le_season'], reference['le_region'])
+    y = reference['le_crop'].transform(df['label'])
+    n_classes = len(reference['le_crop'].classes_)
+
+    candidates = make_candidates()
+    only = set(filter(None, args.only.split(',')))
+    if only:
+        candidates = {name: factory for name, factory in candidates.items() if name in only}
+
+    print(f"⏳ {args.folds}-fold CV for {len(candidates)} candidates ({len(df)} rows)...", flush=True)
+    folds = list(StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=42).split(X, y))
+    outputs = Parallel(n_jobs=args.jobs)(
+        delayed(run_fold)(name, factory, X, y, train_idx, test_idx, n_classes)
+        for name, factory in candidates.items()
+        for train_idx, test_idx in folds
+    )
+    oof = {name: np.zeros((len(y), n_classes)) for name in candidates}
+    for name, test_idx, proba in outputs:
+        oof[name][test_idx] = proba
+
+    rows = []
+    for name, factory in candidates.items():
+        print(f"⏳ {name}: latency, artifact and memory...", flush=True)
+        bundle = build_model_bundle(df, model=factory())
+        single_ms, batch_ms = measure_latency(bundle['model'], X)
+        size_kb, stats = measure_artifact(bundle, X)
+        rows.append({
+            'candidate': name,
+            'top1_accuracy': round(top_k_accuracy(oof[name], y, 1), 4),
+            'top3_accuracy': round(top_k_accuracy(oof[name], y, 3), 4),
+            'single_row_ms': round(single_ms, 4),
+            'batch_1000_ms': round(batch_ms, 2),
+            'artifact_kb': round(size_kb, 1),
+            'load_ms': round(stats['load_ms'], 2) if stats else None,
+            'peak_rss_mb': round(stats['peak_rss_mb'], 1) if stats else None,
+            'rss_delta_mb': round(stats['rss_delta_mb'], 1) if stats else None,
+        })
+
+    print("⏳ simple_predictor baseline...", flush=True)
+    rows.append(benchmark_simple_predictor(df))
+
+    def fmt(value):
+        return '-' if value is None else str(value)
+
+    print("\n" + "  ".join(f"{c:>14}" if i else f"{c:<28}" for i, c in enumerate(COLUMNS)))
+    for row in rows:
+        print("  ".join(f"{fmt(row[c]):>14}" if i else f"{row[c]:<28}" for i, c in enumerate(COLUMNS)))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'dataset_rows': len(df), 'folds': args.folds, 'results': rows}, f, indent=2)
+    print(f"\n📄 Results written to {args.output}")
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"📄 CSV written to {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
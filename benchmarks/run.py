@@ -0,0 +1,335 @@
+"""
+End-to-end load and latency benchmark for AgriPredictor-AI.
+
+Drives /predictcrop (ML and rule-based fallback), /dashboard (first and repeat
+views) at several history sizes, /chatbot and /login in-process against local
+stand-ins for OpenWeather, MongoDB and the LLM providers.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --latency weather=300,mongo=5,llm=800 --concurrency 8
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run --compare      # fails on regression vs baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+BASELINE_PATH = os.path.join(RESULTS_DIR, 'baseline.json')
+
+BENCH_EMAIL = 'bench@agripredictor.local'
+BENCH_PASSWORD = 'bench-password'
+
+PREDICT_FORM = {
+    'n': 90, 'p': 40, 'k': 40, 'temperature': 25, 'humidity': 80,
+    'ph': 6.5, 'rainfall': 200, 'soil_type': 'Loamy', 'season': 'Kharif', 'region': 'South'
+}
+
+CROP_NAMES = ['Rice', 'Wheat', 'Maize', 'Millets', 'Pulses', 'Cotton', 'Coffee', 'Jute', 'Banana', 'Mango']
+
+
+def parse_latency(spec):
+    latency = {'weather': 0, 'mongo': 0, 'llm': 0}
+    for part in filter(None, (spec or '').split(',')):
+        name, value = part.split('=')
+        latency[name.strip()] = float(value)
+    return latency
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+class BenchmarkEnvironment:
+    """Boots the app against a throwaway SQLite DB and local stand-ins."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.tmpdir = tempfile.mkdtemp(prefix='agri-bench-')
+
+    def __enter__(self):
+        from benchmarks.standins import StandInServer
+
+        self.server = StandInServer(self.latency).start()
+        os.environ.update({
+            'DATABASE_URL': f"sqlite:///{os.path.join(self.tmpdir, 'bench.db')}",
+            'OPENWEATHER_API_KEY': 'bench',
+            'OPENWEATHER_URL': self.server.weather_url,
+            'OLLAMA_URL': self.server.ollama_url,
+            # Empty keys force the chatbot onto the (stand-in) Ollama path
+            'GROQ_API_KEY': '',
+            'GOOGLE_API_KEY': '',
+            'PINECONE_API_KEY': '',
+            # One benchmark user drives every request; rate limits would skew the numbers
+            'ADMISSION_ENABLED': '0',
+        })
+        sys.path.insert(0, BASE_DIR)
+        import app as app_module
+        from modules.catalog import CROP_DETAILS
+        from benchmarks.standins import StandInCropCollection
+
+        self.app_module = app_module
+        app_module._crop_collection.set(StandInCropCollection(
+            [{'name': name, **details} for name, details in CROP_DETAILS.items()],
+            latency_ms=self.latency.get('mongo', 0)
+        ))
+        with contextlib.redirect_stdout(io.StringIO()):
+            app_module.warm_up()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.stop()
+
+    def use_ml_model(self, bundle):
+        self.app_module._model_bundle.set(bundle)
+
+    def use_fallback(self):
+        # An empty bundle sends every prediction down the fallback path
+        self.app_module._model_bundle.set({})
+
+    def create_user(self, email, history_size=0):
+        from werkzeug.security import generate_password_hash
+
+        app_module = self.app_module
+        with app_module.app.app_context():
+            user = app_module.User(name='Bench Farmer', email=email, location='Pune',
+                                   password=generate_password_hash(BENCH_PASSWORD))
+            app_module.db.session.add(user)
+            app_module.db.session.commit()
+
+            rng = random.Random(history_size)
+            crops = list(CROP_NAMES)
+            now = datetime.utcnow()
+            rows = []
+            for i in range(history_size):
+                c1, c2, c3 = rng.sample(crops, 3)
+                rows.append(app_module.Prediction(
+                    user_id=user.id, n=rng.uniform(0, 140), p=rng.uniform(5, 145), k=rng.uniform(5, 205),
+                    temperature=rng.uniform(10, 40), humidity=rng.uniform(20, 95), ph=rng.uniform(4.5, 8.5),
+                    rainfall=rng.uniform(50, 300), soil_type='Loamy', season='Kharif', region='South',
+                    crop1=c1, confidence1=rng.uniform(40, 95), crop2=c2, confidence2=rng.uniform(10, 40),
+                    crop3=c3, confidence3=rng.uniform(1, 10), drought_risk=rng.uniform(0, 100),
+                    flood_risk=rng.uniform(0, 100), created_at=now - timedelta(hours=i)
+                ))
+            app_module.db.session.add_all(rows)
+            app_module.db.session.commit()
+
+    def logged_in_client(self, email):
+        client = self.app_module.app.test_client()
+        client.post('/login', data={'email': email, 'password': BENCH_PASSWORD})
+        return client
+
+
+def run_scenario(name, make_client, request_fn, total, concurrency):
+    """Fires `total` requests from `concurrency` threads; each thread owns one client."""
+    local = threading.local()
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        if not hasattr(local, 'client'):
+            local.client = make_client()
+        start = time.perf_counter()
+        try:
+            ok = request_fn(local.client)
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughput_rps': round(total / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+DASHBOARD_URLS = ['/dashboard'] + [f'/dashboard/data/{panel}' for panel in ('summary', 'dist', 'trend', 'comparison')]
+
+
+def load_dashboard(client, revalidate=False):
+    """
+    Fetches the dashboard shell and its panels like a browser would. With
+    revalidate=True the first load's ETags are sent back and every response
+    must be a 304. Returns None if any request fails.
+    """
+    etags = getattr(client, 'dashboard_etags', None)
+    if revalidate and etags is None:
+        # The first shell after login still carries the login flash message
+        load_dashboard(client)
+        etags = client.dashboard_etags = {url: client.get(url).headers.get('ETag') for url in DASHBOARD_URLS}
+    for url in DASHBOARD_URLS:
+        if revalidate:
+            if client.get(url, headers={'If-None-Match': etags[url]}).status_code != 304:
+                return None
+        elif client.get(url).status_code != 200:
+            return None
+    return True
+
+
+def build_scenarios(env, history_sizes):
+    from modules.training import build_model_bundle
+
+    env.create_user(BENCH_EMAIL)
+    for size in history_sizes:
+        env.create_user(f'dash{size}@agripredictor.local', history_size=size)
+
+    def predict(client):
+        r = client.post('/predictcrop', data=PREDICT_FORM)
+        return r.status_code == 200 and b'Rank #1' in r.data
+
+    def bench_client():
+        return env.logged_in_client(BENCH_EMAIL)
+
+    bundle = build_model_bundle()
+    scenarios = [
+        ('predictcrop_ml', lambda: env.use_ml_model(bundle), bench_client, predict),
+        ('predictcrop_fallback', env.use_fallback, bench_client, predict),
+    ]
+    for size in history_sizes:
+        email = f'dash{size}@agripredictor.local'
+        scenarios.append((
+            f'dashboard_{size}', None,
+            lambda email=email: env.logged_in_client(email),
+            lambda client: load_dashboard(client) is not None
+        ))
+        # Repeat view: the browser revalidates the shell and every panel with its ETag
+        scenarios.append((
+            f'dashboard_{size}_repeat', None,
+            lambda email=email: env.logged_in_client(email),
+            lambda client: load_dashboard(client, revalidate=True) is not None
+        ))
+    scenarios.append((
+        'chatbot', None, bench_client,
+        lambda client: client.post('/chatbot', data={'query': 'How do I improve maize yield?'}).status_code == 200
+    ))
+    scenarios.append((
+        'login', None, env.app_module.app.test_client,
+        lambda client: client.post('/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}).status_code == 302
+    ))
+    return scenarios
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regression messages (p95 slower or throughput lower than tolerance allows)."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        if previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous['throughput_rps'] and current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AgriPredictor-AI load and latency benchmark")
+    parser.add_argument('--requests', type=int, default=200, help="requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="client threads (matches gunicorn --threads)")
+    parser.add_argument('--latency', default='weather=150,mongo=5,llm=600',
+                        help="injected stand-in latency in ms, e.g. weather=150,mongo=5,llm=600")
+    parser.add_argument('--history-sizes', default='10,100,1000', help="dashboard prediction history sizes")
+    parser.add_argument('--only', default='', help="comma-separated scenario names to run")
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'latest.json'))
+    parser.add_argument('--save-baseline', action='store_true', help="also store results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="compare against the stored baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument('--verbose', action='store_true', help="keep app log output")
+    args = parser.parse_args()
+
+    latency = parse_latency(args.latency)
+    history_sizes = [int(s) for s in args.history_sizes.split(',') if s]
+    only = set(filter(None, args.only.split(',')))
+
+    results = {}
+    with BenchmarkEnvironment(latency) as env:
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            scenarios = build_scenarios(env, history_sizes)
+        for name, setup, make_client, request_fn in scenarios:
+            if only and name not in only:
+                continue
+            if setup:
+                setup()
+            print(f"⏳ {name}...", flush=True)
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                results[name] = run_scenario(name, make_client, request_fn, args.requests, args.concurrency)
+
+    print(f"\n{'scenario':<24} {'reqs':>6} {'errs':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 76)
+    for name, r in results.items():
+        print(f"{name:<24} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>9.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'latency_ms': latency,
+        },
+        'results': results
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline stored at {BASELINE_PATH}")
+
+    if args.compare:
+        if not os.path.exists(BASELINE_PATH):
+            print("⚠️ No baseline found; run with --save-baseline first")
+            sys.exit(1)
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions vs baseline:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print("\n✅ No regressions vs baseline")
+
+
+if __name__ == '__main__':
+    main()
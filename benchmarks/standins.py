@@ -0,0 +1,93 @@
+"""
+Local stand-ins for the external services AgriPredictor-AI talks to.
+Each one supports injected latency so benchmarks can model slow dependencies.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer:
+    """
+    Serves OpenWeather (/data/2.5/weather) and Ollama (/api/generate) on localhost.
+    latency is a dict of milliseconds keyed by 'weather' and 'llm'.
+    """
+
+    def __init__(self, latency=None):
+        self.latency = latency or {}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def weather_url(self):
+        return f"{self.base_url}/data/2.5/weather"
+
+    @property
+    def ollama_url(self):
+        return f"{self.base_url}/api/generate"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        latency = self.latency
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.startswith('/data/2.5/weather'):
+                    time.sleep(latency.get('weather', 0) / 1000)
+                    self._send_json({'main': {'temp': 27.5, 'humidity': 64}, 'name': 'Stand-in'})
+                else:
+                    self._send_json({'error': 'not found'}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                if self.path == '/api/generate':
+                    time.sleep(latency.get('llm', 0) / 1000)
+                    self._send_json({'response': 'Stand-in agronomy answer. ' * 40})
+                else:
+                    self._send_json({'error': 'not found'}, status=404)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class StandInCropCollection:
+    """In-memory replacement for the MongoDB crops collection."""
+
+    def __init__(self, documents, latency_ms=0):
+        self.documents = {doc['name']: doc for doc in documents}
+        self.latency_ms = latency_ms
+
+    def find_one(self, query):
+        time.sleep(self.latency_ms / 1000)
+        doc = self.documents.get(query.get('name'))
+        return dict(doc) if doc else None
+
+    def find(self, query):
+        time.sleep(self.latency_ms / 1000)
+        names = query.get('name', {}).get('$in', [])
+        return [dict(self.documents[name]) for name in names if name in self.documents]
@@ -0,0 +1,119 @@
+"""
+Static asset build step.
+
+- Fingerprints static/css and static/js files (name.<hash>.ext) and writes
+  .gz (and .br when `brotli` is installed) siblings
+- Builds resized JPEG + WebP variants of every crop photo in static/images
+- Writes static/dist/manifest.json, read at runtime by modules/assets.py
+
+Usage:
+    python build_assets.py
+Run it as part of the deploy build (after pip install); without it the app
+serves the raw files from /static.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+
+from modules.assets import IMAGE_WIDTHS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+TEXT_DIRS = ('css', 'js')
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def write_file(relative_path, data):
+    path = os.path.join(DIST_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build_text_assets(manifest):
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("⚠️ brotli not installed, writing gzip only")
+
+    for folder in TEXT_DIRS:
+        source_dir = os.path.join(STATIC_DIR, folder)
+        if not os.path.isdir(source_dir):
+            continue
+        for name in sorted(os.listdir(source_dir)):
+            with open(os.path.join(source_dir, name), 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(name)
+            hashed = f"{folder}/{stem}.{fingerprint(data)}{ext}"
+            write_file(hashed, data)
+            manifest['assets'][f"{folder}/{name}"] = hashed
+
+            encodings = []
+            write_file(hashed + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            encodings.append('gzip')
+            if brotli:
+                write_file(hashed + '.br', brotli.compress(data, quality=11))
+                encodings.append('br')
+            manifest['compressed'][hashed] = encodings
+            print(f"✅ {folder}/{name} -> {hashed} ({', '.join(encodings)})")
+
+
+def build_images(manifest):
+    try:
+        from PIL import Image
+    except ImportError:
+        print("⚠️ Pillow not installed, skipping image variants")
+        return
+
+    source_dir = os.path.join(STATIC_DIR, 'images')
+    for name in sorted(os.listdir(source_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in ('.jpg', '.jpeg', '.png'):
+            continue
+        with Image.open(os.path.join(source_dir, name)) as original:
+            original = original.convert('RGB')
+            widths = [w for w in IMAGE_WIDTHS if w < original.width] or [original.width]
+            variants = {}
+            for width in widths:
+                height = round(original.height * width / original.width)
+                resized = original.resize((width, height), Image.LANCZOS)
+                variant = {}
+                for fmt, options in (('jpg', {'format': 'JPEG', 'quality': JPEG_QUALITY, 'progressive': True, 'optimize': True}),
+                                     ('webp', {'format': 'WEBP', 'quality': WEBP_QUALITY, 'method': 6})):
+                    buffer = io.BytesIO()
+                    resized.save(buffer, **options)
+                    data = buffer.getvalue()
+                    path = f"images/{stem.lower()}.{width}.{fingerprint(data)}.{fmt}"
+                    write_file(path, data)
+                    variant[fmt] = path
+                variants[str(width)] = variant
+        manifest['images'][name.lower()] = {'widths': variants}
+        print(f"✅ images/{name} -> {len(variants)} sizes (jpg + webp)")
+
+
+def main():
+    if os.path.exists(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {'assets': {}, 'images': {}, 'compressed': {}}
+    build_text_assets(manifest)
+    build_images(manifest)
+
+    with open(os.path.join(DIST_DIR, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"📄 Manifest written to {os.path.join(DIST_DIR, 'manifest.json')}")
+
+
+if __name__ == '__main__':
+    main()
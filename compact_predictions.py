@@ -0,0 +1,69 @@
+"""
+Retention job for the Prediction table (see modules/retention.py).
+
+Predictions older than PREDICTION_RETENTION_DAYS (default 90) are archived to
+archive/predictions-YYYY-MM.jsonl.gz, folded into daily per-user summary rows
+and deleted in batches of RETENTION_BATCH_SIZE.
+
+Usage:
+    python compact_predictions.py                      # compact everything past the cutoff
+    python compact_predictions.py --dry-run            # only count what would be compacted
+    python compact_predictions.py --days 30 --max-batches 20
+    python compact_predictions.py --enable-incremental-vacuum   # one-off, run while traffic is low
+Set RETENTION_INTERVAL_HOURS to also run it periodically inside the web process (see wsgi.py).
+"""
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive and compact old predictions")
+    parser.add_argument('--days', type=int, default=None, help="retention age (default PREDICTION_RETENTION_DAYS)")
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--max-batches', type=int, default=None)
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="switch SQLite to incremental auto-vacuum (runs a full VACUUM once)")
+    args = parser.parse_args()
+
+    from app import app, db, ensure_prediction_indexes, get_prediction_retention, get_regional_aggregator
+
+    with app.app_context():
+        # Databases created before retention existed lack the summary table and index
+        db.create_all()
+        ensure_prediction_indexes()
+        retention = get_prediction_retention()
+        if args.days is not None:
+            retention.max_age_days = args.days
+        if args.batch_size is not None:
+            retention.batch_size = args.batch_size
+
+        if args.enable_incremental_vacuum:
+            print("⏳ Switching to incremental auto-vacuum (full VACUUM)...")
+            changed = retention.enable_incremental_vacuum()
+            print("✅ Incremental auto-vacuum enabled" if changed else "✅ Nothing to do")
+        elif retention.auto_vacuum_mode() == 0:
+            print("⚠️ auto_vacuum is off: freed pages are reused but the file won't shrink "
+                  "(run once with --enable-incremental-vacuum)")
+
+        if not args.dry_run:
+            # Rows must reach the regional cubes before they are compacted away
+            folded = get_regional_aggregator().run(wait=True)
+            print(f"✅ Regional cubes: aggregated {folded} new predictions")
+
+        print(f"⏳ Compacting predictions older than {retention.max_age_days} days...")
+        stats = retention.run(max_batches=args.max_batches, dry_run=args.dry_run)
+        if stats['skipped']:
+            print("⚠️ Another process is compacting right now; try again later")
+            return
+        verb = "would compact" if args.dry_run else "compacted"
+        print(f"✅ {verb} {stats['rows']} rows in {stats['batches']} batches "
+              f"({stats['seconds']}s, {stats['pages_freed']} pages freed, cutoff {stats['cutoff']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Distills the full crop model into models/crop_model_tiny.json.
+
+A shallow DecisionTreeRegressor learns the teacher's class probabilities on the
+dataset rows plus jittered copies of them. It is then exported as nested JSON
+with only the top-3 crops per leaf (see modules/tiny_model.py), and the
+agreement with the teacher is measured on a holdout set and stored in the
+artifact.
+
+Usage:
+    python distill_model.py                    # teacher = models/crop_model.pkl
+    python distill_model.py --train-teacher --output /tmp/tiny.json   # experiments only
+    python distill_model.py --max-depth 10 --samples 60000
+"""
+import argparse
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from modules.tiny_model import TINY_MODEL_PATH, TinyCropModel
+from modules.training import NUMERIC_FEATURES, load_crop_dataset
+
+TEACHER_PATH = os.path.join(BASE_DIR, 'models', 'crop_model.pkl')
+
+
+def load_teacher(train):
+    if not train:
+        if not os.path.exists(TEACHER_PATH):
+            sys.exit(f"❌ {TEACHER_PATH} not found; the shipped artifact must be distilled from the production model")
+        import joblib
+        print(f"⏳ Loading teacher: {TEACHER_PATH}")
+        return joblib.load(TEACHER_PATH)
+    from modules.training import build_model_bundle
+    print("⏳ Training teacher from models/crop.csv.csv")
+    return build_model_bundle()
+
+
+def make_samples(df, teacher, count, seed):
+    """
+    Dataset rows plus jittered copies, as a feature matrix. The CSV has no real
+    soil/season/region columns, so every row gets category codes drawn from the
+    teacher's own encoders (dataset strings may not be among its classes).
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    encoders = (teacher['le_soil'], teacher['le_season'], teacher['le_region'])
+    numeric = df[NUMERIC_FEATURES].to_numpy(dtype=float)
+
+    def with_random_categories(rows):
+        codes = [rng.integers(0, len(encoder.classes_), size=len(rows)) for encoder in encoders]
+        return np.column_stack([rows] + codes)
+
+    base = with_random_categories(numeric)
+    picks = numeric[rng.integers(0, len(numeric), size=count)].copy()
+    picks += rng.normal(0, 1, size=picks.shape) * numeric.std(axis=0) * 0.15
+    picks = with_random_categories(np.clip(picks, 0, None))
+    return np.vstack([base, picks])
+
+
+def export_tree(regressor, top=3):
+    tree = regressor.tree_
+
+    def node(i):
+        if tree.children_left[i] == -1:
+            proba = tree.value[i][:, 0]
+            best = proba.argsort()[::-1][:top]
+            return [[int(c) for c in best], [round(float(proba[c]) * 100, 1) for c in best]]
+        return [int(tree.feature[i]), round(float(tree.threshold[i]), 3),
+                node(tree.children_left[i]), node(tree.children_right[i])]
+
+    return node(0)
+
+
+def agreement(student, teacher_proba, X):
+    """Top-1 agreement, student top-1 within teacher top-3, and mean top-3 overlap."""
+    import numpy as np
+
+    teacher_top3 = np.argsort(teacher_proba, axis=1)[:, ::-1][:, :3]
+    top1 = in_top3 = overlap = 0
+    for row, expected in zip(X, teacher_top3):
+        predicted, _ = student._leaf(list(row))
+        top1 += predicted[0] == expected[0]
+        in_top3 += predicted[0] in expected
+        overlap += len(set(predicted) & set(expected)) / 3
+    n = len(X)
+    return {'top1_agreement': round(top1 / n, 4),
+            'top1_in_teacher_top3': round(in_top3 / n, 4),
+            'top3_overlap': round(overlap / n, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the crop model into a tiny JSON tree")
+    parser.add_argument('--train-teacher', action='store_true',
+                        help="train a stand-in teacher from the CSV instead of loading crop_model.pkl (needs --output)")
+    parser.add_argument('--max-depth', type=int, default=8)
+    parser.add_argument('--min-samples-leaf', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=30000, help="jittered samples added to the dataset rows")
+    parser.add_argument('--output', default=TINY_MODEL_PATH)
+    args = parser.parse_args()
+    if args.train_teacher and os.path.abspath(args.output) == TINY_MODEL_PATH:
+        # The app refuses stand-in artifacts anyway; don't overwrite the shipped one
+        parser.error("--train-teacher needs an --output other than the shipped artifact")
+
+    from sklearn.model_selection import train_test_split
+    from sklearn.tree import DecisionTreeRegressor
+
+    teacher = load_teacher(args.train_teacher)
+    df = load_crop_dataset()
+    X = make_samples(df, teacher, args.samples, seed=42)
+    teacher_proba = teacher['model'].predict_proba(X)
+    X_train, X_test, p_train, p_test = train_test_split(X, teacher_proba, test_size=0.2, random_state=42)
+
+    print(f"⏳ Fitting student tree (depth {args.max_depth}) on {len(X_train)} samples...")
+    student_tree = DecisionTreeRegressor(max_depth=args.max_depth, min_samples_leaf=args.min_samples_leaf,
+                                         random_state=42).fit(X_train, p_train)
+
+    artifact = {
+        'crops': [str(c) for c in teacher['le_crop'].classes_],
+        'soil_types': [str(c) for c in teacher['le_soil'].classes_],
+        'seasons': [str(c) for c in teacher['le_season'].classes_],
+        'regions': [str(c) for c in teacher['le_region'].classes_],
+        'tree': export_tree(student_tree),
+    }
+    scores = agreement(TinyCropModel(artifact), p_test, X_test)
+    artifact['metadata'] = {
+        'teacher': 'trained from crop.csv.csv' if args.train_teacher else 'crop_model.pkl',
+        'max_depth': args.max_depth,
+        'leaves': int(student_tree.get_n_leaves()),
+        'holdout_rows': len(X_test),
+        **scores
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(artifact, f, separators=(',', ':'))
+    size_kb = os.path.getsize(args.output) / 1024
+    print(f"✅ Tiny model written to {args.output} ({size_kb:.1f} KB, {artifact['metadata']['leaves']} leaves)")
+    for name, value in scores.items():
+        print(f"   {name}: {value:.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+In-process admission control for the expensive routes.
+
+Each guarded route has a RoutePolicy:
+  - a token bucket per user (session user id, else client address): `rate_per_min`
+    sustained with bursts of `burst`; over the limit -> 429 with Retry-After
+  - a concurrency cap: at most `concurrency` requests run at once; extra requests
+    wait up to `queue_wait_ms` for a slot, then get 503
+Load shedding: when `shed_in_flight` guarded requests are already being
+served (across all guarded routes), or `max_queue` requests are waiting for
+slots, guarded requests are rejected with 503 straight away so the remaining
+threads stay free for cheap pages and /health. Unguarded traffic (assets,
+dashboard panels, /analytics/regional) is only reported in
+agri_requests_in_flight; a dashboard's burst of panel fetches doesn't shed
+predictions.
+"""
+import os
+import threading
+import time
+
+from modules.metrics import registry
+
+registry.describe('agri_admission_total', 'Admission decisions for guarded routes by outcome')
+registry.describe('agri_admission_wait_seconds', 'Time guarded requests waited for a concurrency slot')
+registry.describe('agri_admission_in_flight', 'Guarded requests currently running by route')
+registry.describe('agri_admission_queue_depth', 'Requests waiting for a concurrency slot')
+registry.describe('agri_requests_in_flight', 'Requests currently being served (all routes)')
+
+# route -> (requests per minute per user, burst, concurrent requests)
+DEFAULT_POLICIES = {
+    '/predictcrop': (20, 5, 4),
+    '/predictcrop/bulk': (2, 1, 1),
+    '/predictcrop/sweep': (30, 10, 2),
+    '/predictcrop/amend': (20, 5, 2),
+    '/chatbot': (10, 3, 3),
+}
+
+# Routes called from scripts/fetch: rejections are JSON, like their other errors
+JSON_ROUTES = {'/predictcrop/bulk', '/predictcrop/sweep', '/predictcrop/amend', '/chatbot'}
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec, burst):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Returns 0 if a token was taken, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self):
+        return self.tokens + (time.monotonic() - self.updated) * self.rate >= self.burst
+
+
+class RoutePolicy:
+    def __init__(self, rate_per_min, burst, concurrency, methods=('POST',)):
+        self.rate_per_min = rate_per_min
+        self.burst = burst
+        self.concurrency = concurrency
+        self.methods = set(methods)
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.buckets = {}
+        self.in_flight = 0
+
+
+class Rejection:
+    def __init__(self, status, reason, retry_after):
+        self.status = status
+        self.reason = reason
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class AdmissionController:
+    # Idle (full) buckets are dropped once this many users are tracked for a route
+    MAX_BUCKETS = 10000
+
+    def __init__(self, policies=None, shed_in_flight=6, max_queue=4, queue_wait_ms=250, enabled=True):
+        self.policies = {route: RoutePolicy(*spec) for route, spec in (policies or DEFAULT_POLICIES).items()}
+        self.shed_in_flight = shed_in_flight
+        self.max_queue = max_queue
+        self.queue_wait = queue_wait_ms / 1000
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.guarded_in_flight = 0
+        self.queued = 0
+
+    @classmethod
+    def from_env(cls):
+        """ADMISSION_POLICIES="/predictcrop=20:5:4,/chatbot=10:3:3" overrides the defaults per route."""
+        policies = dict(DEFAULT_POLICIES)
+        for item in filter(None, os.environ.get('ADMISSION_POLICIES', '').split(',')):
+            route, _, spec = item.strip().partition('=')
+            rate, burst, concurrency = spec.split(':')
+            policies[route] = (float(rate), float(burst), int(concurrency))
+        return cls(
+            policies,
+            shed_in_flight=int(os.environ.get('ADMISSION_SHED_IN_FLIGHT', 6)),
+            max_queue=int(os.environ.get('ADMISSION_MAX_QUEUE', 4)),
+            queue_wait_ms=float(os.environ.get('ADMISSION_QUEUE_WAIT_MS', 250)),
+            enabled=os.environ.get('ADMISSION_ENABLED', '1') != '0',
+        )
+
+    # ---------------- Global in-flight tracking ----------------
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+            registry.set_gauge('agri_requests_in_flight', self.in_flight)
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+            registry.set_gauge('agri_requests_in_flight', self.in_flight)
+
+    # ---------------- Admission ----------------
+    def admit(self, route, method, user_key):
+        """
+        Returns (policy, None) when admitted (call release(route, policy) afterwards),
+        (None, Rejection) when rejected, or (None, None) for unguarded requests.
+        """
+        policy = self.policies.get(route)
+        if not self.enabled or policy is None or method not in policy.methods:
+            return None, None
+
+        # Shed first: it costs nothing and protects the thread pool
+        if self.guarded_in_flight >= self.shed_in_flight or self.queued >= self.max_queue:
+            return None, self._reject(route, 503, 'shed', 1)
+
+        with self._lock:
+            bucket = policy.buckets.get(user_key)
+            if bucket is None:
+                if len(policy.buckets) >= self.MAX_BUCKETS:
+                    policy.buckets = {key: b for key, b in policy.buckets.items() if not b.is_full()}
+                bucket = policy.buckets[user_key] = TokenBucket(policy.rate_per_min / 60, policy.burst)
+            wait = bucket.take()
+        if wait:
+            return None, self._reject(route, 429, 'rate_limited', wait)
+
+        if not policy.slots.acquire(blocking=False):
+            with self._lock:
+                self.queued += 1
+                registry.set_gauge('agri_admission_queue_depth', self.queued)
+            start = time.perf_counter()
+            acquired = policy.slots.acquire(timeout=self.queue_wait)
+            registry.observe('agri_admission_wait_seconds', time.perf_counter() - start, route=route)
+            with self._lock:
+                self.queued -= 1
+                registry.set_gauge('agri_admission_queue_depth', self.queued)
+            if not acquired:
+                return None, self._reject(route, 503, 'concurrency', 1)
+
+        with self._lock:
+            policy.in_flight += 1
+            self.guarded_in_flight += 1
+            registry.set_gauge('agri_admission_in_flight', policy.in_flight, route=route)
+        registry.inc('agri_admission_total', route=route, outcome='admitted')
+        return policy, None
+
+    def release(self, route, policy):
+        with self._lock:
+            policy.in_flight -= 1
+            self.guarded_in_flight -= 1
+            registry.set_gauge('agri_admission_in_flight', policy.in_flight, route=route)
+        policy.slots.release()
+
+    def _reject(self, route, status, reason, retry_after):
+        registry.inc('agri_admission_total', route=route, outcome=reason)
+        return Rejection(status, reason, retry_after)
@@ -0,0 +1,193 @@
+"""
+Minimal-amendment search: the cheapest change to N, P, K and pH that makes a
+target crop rank in the top 3 with at least a given confidence.
+
+Fertilizer can only add N, P and K; pH can be raised (lime) or lowered
+(sulfur). The search is coarse to fine, and every step is one batched model
+call (each call has a fixed cost, so there are only a handful):
+  1. a coarse grid over all four amendments, including "no change"
+  2. finer grids (half the step each round) around the cheapest few feasible
+     points, until the rounds or the time budget run out
+  3. each amendment of the winner is shrunk towards zero on its own
+  4. the shrunk and the unshrunk winner, each rounded to values a farmer can
+     apply and as is, are checked together; the first that stays feasible wins
+"""
+import os
+import time
+from itertools import product
+
+AMENDMENTS = ('n', 'p', 'k', 'ph')
+# Relative effort per unit: one unit of N, P or K vs a whole pH unit of liming
+DEFAULT_COSTS = {'n': 1.0, 'p': 1.0, 'k': 1.0, 'ph': 60.0}
+# Final changes are rounded away from zero to these steps
+ROUNDING = {'n': 1.0, 'p': 1.0, 'k': 1.0, 'ph': 0.1}
+NUTRIENT_NAMES = {'n': 'nitrogen (N)', 'p': 'phosphorus (P)', 'k': 'potassium (K)'}
+
+
+def describe_changes(changes):
+    """Plain-language steps for the result card."""
+    steps = []
+    for name in ('n', 'p', 'k'):
+        if changes[name] > 0:
+            steps.append(f"Add {changes[name]:g} {NUTRIENT_NAMES[name]}")
+    if changes['ph'] > 0:
+        steps.append(f"Raise pH by {changes['ph']:g} (agricultural lime)")
+    elif changes['ph'] < 0:
+        steps.append(f"Lower pH by {-changes['ph']:g} (elemental sulfur)")
+    return steps
+
+
+class AmendmentOptimizer:
+    def __init__(self, evaluate, costs=None, max_nutrient=150, max_ph_change=1.5,
+                 coarse_steps=7, rounds=3, beam=4, budget_ms=300):
+        """
+        evaluate(field, overrides) -> (crop names, probability matrix), with
+        one row per value in the override columns.
+        """
+        self.evaluate = evaluate
+        self.costs = dict(DEFAULT_COSTS, **(costs or {}))
+        self.max_nutrient = max_nutrient
+        self.max_ph_change = max_ph_change
+        self.coarse_steps = coarse_steps
+        self.rounds = rounds
+        self.beam = beam
+        self.budget = budget_ms / 1000
+
+    @classmethod
+    def from_env(cls, evaluate):
+        return cls(
+            evaluate,
+            max_nutrient=float(os.environ.get('AMENDMENT_MAX_NUTRIENT', 150)),
+            max_ph_change=float(os.environ.get('AMENDMENT_MAX_PH_CHANGE', 1.5)),
+            budget_ms=float(os.environ.get('AMENDMENT_BUDGET_MS', 300)),
+        )
+
+    def _bounds(self, field):
+        """(lowest, highest) change per amendment, kept inside the sweepable ranges."""
+        from modules.sweep import VARIABLE_BOUNDS
+
+        bounds = []
+        for name in AMENDMENTS:
+            floor, ceiling = VARIABLE_BOUNDS[name]
+            if name == 'ph':
+                bounds.append((max(-self.max_ph_change, floor - field[name]),
+                               min(self.max_ph_change, ceiling - field[name])))
+            else:
+                bounds.append((0.0, max(0.0, min(self.max_nutrient, ceiling - field[name]))))
+        return bounds
+
+    def _score(self, field, deltas, target):
+        """(target confidence in percent, target rank) for each row of changes."""
+        import numpy as np
+
+        overrides = {name: field[name] + deltas[:, i] for i, name in enumerate(AMENDMENTS)}
+        crops, probabilities = self.evaluate(field, overrides)
+        self.evaluated += len(deltas)
+        if target not in crops:
+            # The fallback only scores each row's top 3; the target made none of them
+            return np.zeros(len(deltas)), np.full(len(deltas), len(crops) + 1)
+        target_p = probabilities[:, crops.index(target)]
+        rank = (probabilities > target_p[:, None]).sum(axis=1) + 1
+        return target_p * 100, rank
+
+    def _costs(self, deltas):
+        import numpy as np
+
+        weights = np.array([self.costs[name] for name in AMENDMENTS])
+        return np.abs(deltas) @ weights
+
+    def _feasible(self, field, deltas, target, min_confidence):
+        confidence, rank = self._score(field, deltas, target)
+        return (rank <= 3) & (confidence >= min_confidence), confidence, rank
+
+    def optimize(self, field, target, min_confidence=20):
+        import numpy as np
+
+        start = time.perf_counter()
+        self.evaluated = 0
+        bounds = self._bounds(field)
+        low = np.array([b[0] for b in bounds])
+        high = np.array([b[1] for b in bounds])
+
+        # 1. Coarse grid; its "no change" row is the field as it is
+        axes = [np.unique(np.append(np.linspace(lo, hi, self.coarse_steps), 0.0)) for lo, hi in bounds]
+        grid = np.array(list(product(*axes)))
+        ok, confidence, rank = self._feasible(field, grid, target, min_confidence)
+        unchanged = int(np.flatnonzero(~grid.any(axis=1))[0])
+        base = (float(confidence[unchanged]), int(rank[unchanged]))
+        if ok[unchanged]:
+            return self._result(field, target, min_confidence, grid[unchanged], base, base, start, feasible=True)
+        if not ok.any():
+            return self._infeasible(field, target, min_confidence, base, start)
+
+        pool = grid[ok]
+        step = (high - low) / (self.coarse_steps - 1)
+        # 2. Refine around the cheapest feasible points
+        offsets = np.array(list(product((-1.0, 0.0, 1.0), repeat=len(AMENDMENTS))))
+        for _ in range(self.rounds):
+            if time.perf_counter() - start > self.budget:
+                break
+            step = step / 2
+            beam = pool[np.argsort(self._costs(pool))[:self.beam]]
+            candidates = np.clip((beam[:, None, :] + offsets[None, :, :] * step).reshape(-1, len(AMENDMENTS)),
+                                 low, high)
+            candidates = np.unique(candidates, axis=0)
+            ok, _, _ = self._feasible(field, candidates, target, min_confidence)
+            pool = np.vstack([beam, candidates[ok]])
+        best = pool[np.argmin(self._costs(pool))]
+
+        # 3. Shrink each amendment towards zero, all four in one batch
+        fractions = np.linspace(0, 1, 11)
+        trials = np.repeat(best[None, :], len(AMENDMENTS) * len(fractions), axis=0)
+        for i in range(len(AMENDMENTS)):
+            trials[i * len(fractions):(i + 1) * len(fractions), i] = best[i] * fractions
+        ok, _, _ = self._feasible(field, trials, target, min_confidence)
+        shrunk = best.copy()
+        for i in range(len(AMENDMENTS)):
+            feasible_fractions = fractions[ok[i * len(fractions):(i + 1) * len(fractions)]]
+            if len(feasible_fractions):
+                shrunk[i] = best[i] * feasible_fractions[0]
+
+        # 4. Cheapest feasible of: shrunk (rounded, exact), winner (rounded, exact)
+        finalists = np.vstack([self._round(shrunk, low, high), shrunk, self._round(best, low, high), best])
+        ok, confidence, rank = self._feasible(field, finalists, target, min_confidence)
+        if not ok.any():
+            # Only if the backend changed between calls (e.g. the server fell back in-process)
+            return self._infeasible(field, target, min_confidence, base, start)
+        choice = int(np.argmax(ok))
+        return self._result(field, target, min_confidence, finalists[choice],
+                            (float(confidence[choice]), int(rank[choice])), base, start, feasible=True)
+
+    def _infeasible(self, field, target, min_confidence, base, start):
+        """No amendment within the limits works: no changes, and the field's own confidence."""
+        import numpy as np
+
+        return self._result(field, target, min_confidence, np.zeros(len(AMENDMENTS)), base, base, start,
+                            feasible=False)
+
+    @staticmethod
+    def _round(deltas, low, high):
+        import numpy as np
+
+        rounded = [np.sign(d) * np.ceil(round(abs(d) / ROUNDING[name], 6)) * ROUNDING[name]
+                   for d, name in zip(deltas, AMENDMENTS)]
+        return np.clip(rounded, low, high)
+
+    def _result(self, field, target, min_confidence, deltas, reached, base, start, feasible):
+        changes = {name: round(float(d), 2) + 0.0 for name, d in zip(AMENDMENTS, deltas)}
+        return {
+            'target': target,
+            'min_confidence': min_confidence,
+            'feasible': feasible,
+            'already_met': feasible and not any(changes.values()),
+            'changes': changes,
+            'amended': {name: round(field[name] + changes[name], 2) for name in AMENDMENTS},
+            'steps': describe_changes(changes) if feasible else [],
+            'confidence': round(reached[0], 1),
+            'rank': reached[1],
+            'base_confidence': round(base[0], 1),
+            'base_rank': base[1],
+            'cost': round(float(self._costs(deltas[None, :])[0]), 1),
+            'evaluated': self.evaluated,
+            'ms': round((time.perf_counter() - start) * 1000, 1),
+        }
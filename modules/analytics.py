@@ -1,8 +1,12 @@
+import json
 from datetime import datetime, timedelta
 
+# Weight of a crop's 1st/2nd/3rd place in the recommendation distribution
+RANK_WEIGHTS = (1, 0.6, 0.3)
+
 class AnalyticsEngine:
     @staticmethod
-    def get_crop_comparison_data(predictions=None):
+    def get_crop_comparison_data(predictions=None, summaries=()):
         """
         Returns dynamic crop comparison data based on user's prediction history.
         If no history, returns default curated data for demo purposes.
@@ -19,16 +23,18 @@ class AnalyticsEngine:
         }
         
         # If no user predictions, return empty to keep chart blank as requested
-        if not predictions:
+        if not predictions and not summaries:
             return {}
             
         # If user has predictions, filter to show only crops they have predicted
         # We now collect crop1, crop2, and crop3 to show the full range of recommendations
         user_crops = set()
-        for p in predictions:
+        for p in predictions or []:
             if p.crop1: user_crops.add(p.crop1)
             if p.crop2: user_crops.add(p.crop2)
             if p.crop3: user_crops.add(p.crop3)
+        for summary in summaries:
+            user_crops.update(json.loads(summary.crop_ranks))
         
         # Build dataset dynamically: 
         # 1. Use predefined data if available
@@ -45,19 +51,23 @@ class AnalyticsEngine:
         return filtered_data
 
     @staticmethod
-    def process_prediction_history(predictions):
+    def process_prediction_history(predictions, summaries=()):
         """
-        Aggregates prediction history for charts.
+        Aggregates prediction history (recent rows plus compacted daily summaries) for charts.
         """
-        if not predictions:
+        if not predictions and not summaries:
             return {'labels': [], 'counts': []}
             
         crop_counts = {}
         for pred in predictions:
             # We count all top 3 recommendations as "relevant" to the user
-            if pred.crop1: crop_counts[pred.crop1] = crop_counts.get(pred.crop1, 0) + 1
-            if pred.crop2: crop_counts[pred.crop2] = crop_counts.get(pred.crop2, 0) + 0.6 # Weighted less
-            if pred.crop3: crop_counts[pred.crop3] = crop_counts.get(pred.crop3, 0) + 0.3 # Weighted even less
+            if pred.crop1: crop_counts[pred.crop1] = crop_counts.get(pred.crop1, 0) + RANK_WEIGHTS[0]
+            if pred.crop2: crop_counts[pred.crop2] = crop_counts.get(pred.crop2, 0) + RANK_WEIGHTS[1] # Weighted less
+            if pred.crop3: crop_counts[pred.crop3] = crop_counts.get(pred.crop3, 0) + RANK_WEIGHTS[2] # Weighted even less
+        for summary in summaries:
+            for crop, ranks in json.loads(summary.crop_ranks).items():
+                weight = sum(count * w for count, w in zip(ranks, RANK_WEIGHTS))
+                crop_counts[crop] = crop_counts.get(crop, 0) + weight
         
         return {
             'labels': list(crop_counts.keys()),
@@ -65,12 +75,15 @@ class AnalyticsEngine:
         }
         
     @staticmethod
-    def get_trend_data(predictions):
+    def get_trend_data(predictions, summaries=()):
         """
         Simulates trend data based on history.
         """
         # Group by date
         history = {}
+        for summary in summaries:
+            date_str = summary.day.strftime('%Y-%m-%d')
+            history[date_str] = history.get(date_str, 0) + summary.predictions
         for pred in predictions:
             date_str = pred.created_at.strftime('%Y-%m-%d')
             history[date_str] = history.get(date_str, 0) + 1
@@ -0,0 +1,68 @@
+import json
+import mimetypes
+import os
+
+# Widths generated for crop photos by build_assets.py
+IMAGE_WIDTHS = (160, 320, 640)
+
+# Content-Encoding preference for precompressed text assets
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class AssetManifest:
+    """
+    Reads static/dist/manifest.json written by build_assets.py and maps logical
+    asset names (css/style.css, rice.jpg) to fingerprinted, resized files.
+    Every lookup returns None when the asset wasn't built so callers can fall
+    back to the raw /static file.
+    """
+
+    def __init__(self, dist_dir):
+        self.dist_dir = dist_dir
+        self.assets = {}
+        self.images = {}
+        self.compressed = {}
+        self.load()
+
+    def load(self):
+        path = os.path.join(self.dist_dir, 'manifest.json')
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            self.assets = manifest.get('assets', {})
+            self.images = manifest.get('images', {})
+            self.compressed = manifest.get('compressed', {})
+        except Exception as e:
+            print(f"⚠️ Asset manifest unreadable, serving raw static files: {e}")
+
+    def asset_path(self, logical_path):
+        return self.assets.get(logical_path)
+
+    def image_path(self, image, width, fmt='jpg'):
+        """Smallest built variant at least `width` px wide (or the largest available)."""
+        variants = self.images.get(image.lower(), {}).get('widths', {})
+        if not variants:
+            return None
+        widths = sorted(int(w) for w in variants)
+        chosen = next((w for w in widths if w >= width), widths[-1])
+        return variants[str(chosen)].get(fmt)
+
+    def image_srcset(self, image, fmt='jpg'):
+        """Returns [(path, width), ...] for a srcset attribute."""
+        variants = self.images.get(image.lower(), {}).get('widths', {})
+        return [(v[fmt], int(w)) for w, v in sorted(variants.items(), key=lambda i: int(i[0])) if fmt in v]
+
+    def negotiate(self, path, accept_encoding):
+        """
+        Picks a precompressed sibling of `path` the client accepts.
+        Returns (served_path, content_encoding or None, mimetype).
+        """
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        available = self.compressed.get(path, [])
+        accepted = {part.split(';')[0].strip() for part in accept_encoding.split(',')}
+        for encoding, suffix in ENCODINGS:
+            if encoding in available and encoding in accepted:
+                return path + suffix, encoding, mimetype
+        return path, None, mimetype
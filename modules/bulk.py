@@ -0,0 +1,128 @@
+import csv
+import io
+
+from modules.weather import ClimateRiskEngine
+
+# Accepted header spellings -> field name used by the predictors
+COLUMN_ALIASES = {
+    'n': 'n', 'nitrogen': 'n',
+    'p': 'p', 'phosphorus': 'p',
+    'k': 'k', 'potassium': 'k',
+    'temperature': 'temperature', 'temp': 'temperature',
+    'humidity': 'humidity',
+    'ph': 'ph',
+    'rainfall': 'rainfall',
+    'soil_type': 'soil_type', 'soil': 'soil_type',
+    'season': 'season',
+    'region': 'region',
+}
+NUMERIC_FIELDS = ('n', 'p', 'k', 'temperature', 'humidity', 'ph', 'rainfall')
+TEXT_FIELDS = ('soil_type', 'season', 'region')
+OUTPUT_COLUMNS = ['crop1', 'confidence1', 'crop2', 'confidence2', 'crop3', 'confidence3',
+                  'drought_risk', 'flood_risk', 'error']
+
+
+def parse_row(row, mapping):
+    """Returns (field dict, None) or (None, error message) for one CSV row."""
+    field = {}
+    for header, name in mapping.items():
+        field[name] = (row.get(header) or '').strip()
+    missing = [name for name in NUMERIC_FIELDS + TEXT_FIELDS if not field.get(name)]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    try:
+        for name in NUMERIC_FIELDS:
+            field[name] = float(field[name])
+    except ValueError:
+        return None, f"{name} is not a number"
+    return field, None
+
+
+def unknown_categories(fields, categories):
+    """
+    Error message per field (None when valid) for soil/season/region values
+    the model wasn't trained on, checked a whole column at a time.
+    """
+    import numpy as np
+
+    errors = [None] * len(fields)
+    if not categories or not fields:
+        return errors
+    for name in TEXT_FIELDS:
+        if categories.get(name) is None:
+            continue
+        column = np.array([field[name] for field in fields], dtype=object)
+        for i in np.flatnonzero(~np.isin(column, np.array(categories[name], dtype=object))):
+            errors[i] = errors[i] or f"unknown {name} '{column[i]}'"
+    return errors
+
+
+def annotate_csv(stream, predict_batch, chunk_rows=1000, categories=None):
+    """
+    Reads a CSV from a binary `stream` chunk by chunk and yields the annotated
+    CSV text: original columns plus top-3 crops, confidences, drought/flood risk
+    and an `error` column. Only one chunk is held in memory at a time.
+
+    categories ({'soil_type': [...], 'season': [...], 'region': [...]}; None,
+    or a None list, accepts anything) are checked first, so rows the model would reject get
+    their own error and the rest go to predict_batch(fields) as one batch; it
+    must return one top-3 list per field.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    headers = reader.fieldnames or []
+    mapping = {h: COLUMN_ALIASES[h.strip().lower()] for h in headers if h and h.strip().lower() in COLUMN_ALIASES}
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers + OUTPUT_COLUMNS)
+    yield _drain(buffer)
+
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield _annotate_chunk(chunk, headers, mapping, predict_batch, categories, writer, buffer)
+            chunk = []
+    if chunk:
+        yield _annotate_chunk(chunk, headers, mapping, predict_batch, categories, writer, buffer)
+
+
+def _annotate_chunk(rows, headers, mapping, predict_batch, categories, writer, buffer):
+    parsed = [parse_row(row, mapping) for row in rows]
+    valid = [i for i, (field, _) in enumerate(parsed) if field]
+    for i, error in zip(valid, unknown_categories([parsed[i][0] for i in valid], categories)):
+        if error:
+            parsed[i] = (None, error)
+    fields = [field for field, error in parsed if field]
+
+    results = []
+    if fields:
+        try:
+            results = predict_batch(fields)
+        except Exception as e:
+            results = [e] * len(fields)
+
+    result_iter = iter(results)
+    for row, (field, error) in zip(rows, parsed):
+        original = [row.get(h, '') for h in headers]
+        if error:
+            writer.writerow(original + [''] * (len(OUTPUT_COLUMNS) - 1) + [error])
+            continue
+        top3 = next(result_iter)
+        if isinstance(top3, Exception):
+            writer.writerow(original + [''] * (len(OUTPUT_COLUMNS) - 1) + [str(top3)])
+            continue
+        risk = ClimateRiskEngine.score_conditions(field['temperature'], field['humidity'], field['rainfall'])
+        crops = []
+        for crop in top3[:3]:
+            crops += [crop['name'], crop['confidence']]
+        crops += [''] * (6 - len(crops))
+        writer.writerow(original + crops + [risk['drought_risk'], risk['flood_risk'], ''])
+    return _drain(buffer)
+
+
+def _drain(buffer):
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
@@ -0,0 +1,80 @@
+import os
+
+# Local crop details (fallback when MongoDB has no entry for a crop)
+CROP_DETAILS = {
+    'Rice': {'planting': 'June-July', 'fertilizer': 'Urea, DAP, MOP', 'irrigation': 'Flooded field method', 'yield': '4-6 tons/ha', 'image': 'rice.jpg'},
+    'Wheat': {'planting': 'October-November', 'fertilizer': 'NPK 20:20:20', 'irrigation': 'Sprinkler/Furrow', 'yield': '4-5 tons/ha', 'image': 'wheat.jpg'},
+    'Maize': {'planting': 'June-July or Feb-March', 'fertilizer': 'Urea, DAP', 'irrigation': 'Drip/Sprinkler', 'yield': '6-8 tons/ha', 'image': 'maize.jpg'},
+    'Millets': {'planting': 'June-August', 'fertilizer': 'NPK 10:10:10', 'irrigation': 'Moderate', 'yield': '2-4 tons/ha', 'image': 'millets.jpg'},
+    'Pulses': {'planting': 'July-August', 'fertilizer': 'DAP, Urea', 'irrigation': 'Low', 'yield': '1-2 tons/ha', 'image': 'pulses.jpg'},
+    'Cotton': {'planting': 'April-May', 'fertilizer': 'NPK 20:20:20', 'irrigation': 'Moderate', 'yield': '2-3 tons/ha', 'image': 'cotton.jpg'},
+    'Coffee': {'planting': 'June-August', 'fertilizer': 'NPK 10:5:20', 'irrigation': 'Drip/Sprinkler', 'yield': '1-2 tons/ha', 'image': 'coffee.jpg'},
+    'Jute': {'planting': 'March-May', 'fertilizer': 'N:P:K 2:1:1', 'irrigation': 'Rainfed/Flooded', 'yield': '2-3 tons/ha', 'image': 'jute.jpg'},
+    'Tea': {'planting': 'June-September', 'fertilizer': 'Ammonium Sulphate', 'irrigation': 'Sprinkler', 'yield': '2-3 tons/ha', 'image': 'tea.jpg'},
+    'Sugarcane': {'planting': 'Feb-March', 'fertilizer': '250:125:125 NPK kg/ha', 'irrigation': 'Furrow', 'yield': '80-100 tons/ha', 'image': 'sugarcane.jpg'},
+    'Tobacco': {'planting': 'August-October', 'fertilizer': 'NPK 50:50:50', 'irrigation': 'Furrow', 'yield': '2-3 tons/ha', 'image': 'tobacco.jpg'},
+    'Rubber': {'planting': 'June-July', 'fertilizer': 'NPK 10:10:4', 'irrigation': 'Rainfed', 'yield': '1-2 tons/ha', 'image': 'rubber.jpg'},
+    'Coconut': {'planting': 'May-June', 'fertilizer': 'NPK 500:320:1200g/palm', 'irrigation': 'Drip/Basin', 'yield': '80-100 nuts/palm', 'image': 'coconut.jpg'},
+    'Banana': {'planting': 'Feb-April', 'fertilizer': 'NPK 200:50:200g/plant', 'irrigation': 'Drip', 'yield': '30-40 tons/ha', 'image': 'banana.jpg'},
+    'Grapes': {'planting': 'Oct-Jan', 'fertilizer': 'FYM + NPK', 'irrigation': 'Drip', 'yield': '20-30 tons/ha', 'image': 'grapes.jpg'},
+    'Apple': {'planting': 'Jan-Feb', 'fertilizer': 'FYM + NPK', 'irrigation': 'Drip', 'yield': '10-15 tons/ha', 'image': 'apple.jpg'},
+    'Mango': {'planting': 'July-Aug', 'fertilizer': 'FYM + 1kg NPK/tree', 'irrigation': 'Basin', 'yield': '8-10 tons/ha', 'image': 'mango.jpg'},
+    'Muskmelon': {'planting': 'Feb-March', 'fertilizer': 'NPK 100:50:50', 'irrigation': 'Drip', 'yield': '15-20 tons/ha', 'image': 'muskmelon.jpg'},
+    'Watermelon': {'planting': 'Jan-March', 'fertilizer': 'NPK 100:50:50', 'irrigation': 'Drip', 'yield': '20-25 tons/ha', 'image': 'watermelon.jpg'},
+    'Orange': {'planting': 'July-Aug', 'fertilizer': 'NPK 600:200:300g/tree', 'irrigation': 'Drip/Basin', 'yield': '10-12 tons/ha', 'image': 'orange.jpg'},
+    'Papaya': {'planting': 'Feb-March or June-July', 'fertilizer': 'NPK 200:200:250g/plant', 'irrigation': 'Drip', 'yield': '30-40 tons/ha', 'image': 'papaya.jpg'},
+    'Pomegranate': {'planting': 'Feb-March', 'fertilizer': 'FYM + NPK', 'irrigation': 'Drip', 'yield': '10-12 tons/ha', 'image': 'pomegranate.jpg'},
+    'Lentil': {'planting': 'Oct-Nov', 'fertilizer': 'DAP + Sulphur', 'irrigation': 'Rainfed/Light', 'yield': '1-1.5 tons/ha', 'image': 'lentil.jpg'},
+    'Blackgram': {'planting': 'Feb-March or June-July', 'fertilizer': 'DAP', 'irrigation': 'Rainfed', 'yield': '0.8-1 tons/ha', 'image': 'blackgram.jpg'},
+    'Mungbean': {'planting': 'Feb-March or June-July', 'fertilizer': 'DAP', 'irrigation': 'Rainfed', 'yield': '0.8-1 tons/ha', 'image': 'mungbean.jpg'},
+    'Mothbeans': {'planting': 'June-July', 'fertilizer': 'FYM', 'irrigation': 'Rainfed', 'yield': '0.4-0.6 tons/ha', 'image': 'mothbeans.jpg'},
+    'Pigeonpeas': {'planting': 'June-July', 'fertilizer': 'DAP + FYM', 'irrigation': 'Rainfed', 'yield': '1.5-2 tons/ha', 'image': 'pigeonpeas.jpg'},
+    'Kidneybeans': {'planting': 'May-June', 'fertilizer': 'NPK 40:60:40', 'irrigation': 'Rainfed', 'yield': '1.0-1.5 tons/ha', 'image': 'kidneybeans.jpg'},
+    'Chickpea': {'planting': 'Oct-Nov', 'fertilizer': 'DAP', 'irrigation': 'Sprinkler', 'yield': '1.5-2 tons/ha', 'image': 'chickpea.jpg'}
+}
+
+DEFAULT_DETAILS = {
+    'planting': 'N/A',
+    'fertilizer': 'N/A',
+    'irrigation': 'N/A',
+    'yield': 'N/A',
+    'image': 'default.jpg'
+}
+
+
+class CropCatalog:
+    def __init__(self, image_folder):
+        self.image_folder = image_folder
+        self.details = CROP_DETAILS
+        self._image_index = None
+
+    def build(self):
+        """
+        Indexes the crop image folder once so lookups don't hit the disk per request.
+        """
+        index = {}
+        if os.path.exists(self.image_folder):
+            for f in os.listdir(self.image_folder):
+                index[f.lower()] = f
+        self._image_index = index
+        return self
+
+    def get_image_filename(self, image_name):
+        if self._image_index is None:
+            self.build()
+        base_name = image_name.lower()
+        if not base_name.endswith('.jpg'):
+            base_name += '.jpg'
+        return self._image_index.get(base_name, 'default.jpg')
+
+    def get(self, crop_name, default=None):
+        return self.details.get(crop_name, default)
+
+    def get_display_details(self, crop_name, mongo_crop=None):
+        """
+        Returns display fields for a crop, preferring the MongoDB document when given.
+        """
+        source = mongo_crop if mongo_crop else self.details.get(crop_name, {})
+        details = {key: source.get(key, value) for key, value in DEFAULT_DETAILS.items()}
+        details['image'] = self.get_image_filename(details['image'])
+        return details
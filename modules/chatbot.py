@@ -3,6 +3,8 @@ import requests
 import json
 import time
 from dotenv import load_dotenv
+from modules.metrics import span
+from modules.lazy import LazyResource
 
 load_dotenv()
 
@@ -14,7 +16,7 @@ class AgriBot:
         self.pc_api_key = os.getenv("PINECONE_API_KEY")
         self.index_name = "agri-knowledge"
         
-        self.ollama_url = "http://localhost:11434/api/generate"
+        self.ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
         self.ollama_model = "llama3.2"
         
         # Heavy models (Lazy loaded)
@@ -22,12 +24,19 @@ class AgriBot:
         self.pc = None
         self.index = None
         self.gemini_model = None
-        self.models_loaded = False
         self.Groq = None
+        # Concurrent first questions share one load
+        self._models = LazyResource('agribot_models', self._init_models,
+                                    float(os.getenv('LAZY_RETRY_SECONDS', 60)))
+
+    @property
+    def models_loaded(self):
+        return self._models.loaded
 
     def _load_models(self):
-        if self.models_loaded: return
-        
+        self._models.get()
+
+    def _init_models(self):
         print("⏳ Lazy loading AI models (Lightweight mode)...")
         
         # 1. Load Groq (if not already tried)
@@ -75,21 +84,32 @@ class AgriBot:
             except Exception as e:
                 print(f"⚠️ RAG initialization failed: {e}")
             
-        self.models_loaded = True
+        return True
+
+    def unload_models(self):
+        """Drops the embedding model and API clients; the next question reloads them."""
+        self._models.reset(unload=lambda _: self._drop_models())
+
+    def _drop_models(self):
+        self.embed_model = None
+        self.pc = None
+        self.index = None
+        self.gemini_model = None
 
     def search_context(self, query):
         """Search Pinecone for relevant context (optional)"""
         if not self.index or not self.embed_model: 
             return ""
         try:
-            query_em = self.embed_model.encode(query).tolist()
-            results = self.index.query(vector=query_em, top_k=3, include_metadata=True)
+            with span('rag_search'):
+                query_em = self.embed_model.encode(query).tolist()
+                results = self.index.query(vector=query_em, top_k=3, include_metadata=True)
             return "\n".join([res['metadata']['text'] for res in results['matches']])
         except: 
             return ""
 
     def get_answer(self, query, history=[]):
-        # Ensure base configs are ready
+        # Ensure base configs are ready (callers time the load themselves)
         self._load_models()
         
         context = self.search_context(query)
@@ -112,10 +132,11 @@ class AgriBot:
         if self.groq_key and self.Groq:
             try:
                 client = self.Groq(api_key=self.groq_key)
-                completion = client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=[{"role": "user", "content": prompt}]
-                )
+                with span('llm_groq'):
+                    completion = client.chat.completions.create(
+                        model="llama-3.1-8b-instant",
+                        messages=[{"role": "user", "content": prompt}]
+                    )
                 return completion.choices[0].message.content
             except Exception as e:
                 print(f"⚠️ Groq API failed: {e}")
@@ -123,7 +144,8 @@ class AgriBot:
         # Priority 2: Gemini
         if self.gemini_key and self.gemini_model:
             try:
-                response = self.gemini_model.generate_content(prompt)
+                with span('llm_gemini'):
+                    response = self.gemini_model.generate_content(prompt)
                 return response.text
             except Exception as e:
                 print(f"⚠️ Gemini API failed: {e}")
@@ -132,7 +154,8 @@ class AgriBot:
         try:
             payload = {"model": self.ollama_model, "prompt": prompt, "stream": False}
             print(f"DEBUG: Trying Local AI ({self.ollama_model})...")
-            response = requests.post(self.ollama_url, json=payload, timeout=60)
+            with span('llm_ollama'):
+                response = requests.post(self.ollama_url, json=payload, timeout=60)
             if response.status_code == 200: 
                 return response.json().get('response')
         except: 
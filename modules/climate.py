@@ -0,0 +1,115 @@
+"""
+Offline climate normals for risk scoring.
+
+models/climate_normals.json holds monthly mean temperature, relative humidity
+and rainfall for major Indian cities (with their state, region and common
+alternative names). ClimateNormals indexes every name once and resolves the
+free-text User.location in this order:
+  1. the whole string ("Bangalore", "Tamil Nadu")
+  2. its comma/space separated parts and adjacent pairs ("Whitefield, Bangalore")
+  3. a close fuzzy match on those parts ("Banglore", "Coimbtore")
+  4. the region named in the prediction form (mean of that region's cities)
+Resolved locations are memoized, so repeat lookups are a dict hit.
+"""
+import difflib
+import json
+import os
+import re
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NORMALS_PATH = os.path.join(BASE_DIR, 'models', 'climate_normals.json')
+
+FIELDS = ('temp', 'humidity', 'rainfall')
+# Words that say nothing about where a place is
+_NOISE = {'district', 'city', 'town', 'village', 'dist', 'taluk', 'tehsil', 'state', 'india', 'near'}
+
+
+def normalize(text):
+    words = re.sub(r'[^a-z ]', ' ', (text or '').lower()).split()
+    return ' '.join(w for w in words if w not in _NOISE)
+
+
+class ClimateNormals:
+    # Memoized lookups kept before the oldest are dropped
+    MAX_RESOLVED = 5000
+
+    def __init__(self, locations, fuzzy_cutoff=0.8):
+        self.locations = locations
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.index = {}
+        by_state = {}
+        for name, entry in locations.items():
+            for alias in [name] + entry.get('aliases', []):
+                self.index.setdefault(normalize(alias), name)
+            by_state.setdefault(normalize(entry['state']), name)
+        # A state name maps to its first listed (capital or largest) city
+        for state, name in by_state.items():
+            self.index.setdefault(state, name)
+        self.regions = self._region_means()
+        self._names = list(self.index)
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=NORMALS_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['locations'], fuzzy_cutoff=float(os.environ.get('CLIMATE_FUZZY_CUTOFF', 0.8)))
+
+    def _region_means(self):
+        members = {}
+        for entry in self.locations.values():
+            members.setdefault(entry['region'], []).append(entry)
+        return {
+            region: {field: [round(sum(e[field][m] for e in entries) / len(entries), 1) for m in range(12)]
+                     for field in FIELDS}
+            for region, entries in members.items()
+        }
+
+    def _match(self, text):
+        key = normalize(text)
+        if not key:
+            return None
+        if key in self.index:
+            return self.index[key]
+        words = key.split()
+        parts = [normalize(p) for p in re.split(r'[,/;|-]', text)]
+        candidates = [p for p in parts if p] + [' '.join(words[i:i + 2]) for i in range(len(words) - 1)] + words
+        for candidate in candidates:
+            if candidate in self.index:
+                return self.index[candidate]
+        for candidate in candidates:
+            if len(candidate) < 4:
+                continue
+            close = difflib.get_close_matches(candidate, self._names, n=1, cutoff=self.fuzzy_cutoff)
+            if close:
+                return self.index[close[0]]
+        return None
+
+    def resolve(self, location):
+        """Name of the bundled location matching the free text, or None."""
+        if location in self._resolved:
+            return self._resolved[location]
+        name = self._match(location)
+        with self._lock:
+            if len(self._resolved) >= self.MAX_RESOLVED:
+                self._resolved.pop(next(iter(self._resolved)))
+            self._resolved[location] = name
+        return name
+
+    def lookup(self, location, month, region=None):
+        """
+        Normals for `month` (1-12) at the location, else the region mean.
+        Returns {'temp', 'humidity', 'rainfall', 'matched'} or None.
+        """
+        name = self.resolve(location) if location else None
+        if name:
+            values, matched = self.locations[name], name
+        elif region in self.regions:
+            values, matched = self.regions[region], f"{region} India (regional mean)"
+        else:
+            return None
+        result = {field: values[field][month - 1] for field in FIELDS}
+        result['matched'] = matched
+        return result
@@ -0,0 +1,75 @@
+"""
+Concurrent fan-out of a request's independent I/O calls.
+
+`Deferred(stage, fn, ...)` starts fn on a shared, bounded thread pool right
+away; `result(deadline_ms, default)` waits at most until `deadline_ms` after
+submission and returns `default` if the call is late or fails. A late call
+keeps running in the background (threads can't be cancelled), so every
+dependency should also have its own client timeout. Spans recorded inside fn
+count towards the submitting request's stages.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from modules.metrics import bind_stages, current_stages, record_stage, registry
+
+registry.describe('agri_dependency_timeouts_total', 'Dependency calls that missed their deadline')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Default: two concurrent dependencies for each of the 8 gunicorn threads
+                _executor = ThreadPoolExecutor(max_workers=int(os.environ.get('IO_WORKERS', 16)),
+                                               thread_name_prefix='io')
+    return _executor
+
+
+def deadline_ms(name, default):
+    """Per-dependency deadline from the environment, e.g. MONGO_DEADLINE_MS."""
+    return float(os.environ.get(f'{name.upper()}_DEADLINE_MS', default))
+
+
+class Deferred:
+    def __init__(self, stage, fn, *args, **kwargs):
+        self.stage = stage
+        self.submitted = time.perf_counter()
+        self.elapsed = None
+        self.future = get_executor().submit(self._run, current_stages(), fn, args, kwargs)
+
+    def _run(self, stages, fn, args, kwargs):
+        start = time.perf_counter()
+        try:
+            with bind_stages(stages):
+                return fn(*args, **kwargs)
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def result(self, deadline_ms, default=None, raise_errors=False):
+        """
+        The call's return value, or `default` if it isn't done `deadline_ms`
+        after submission or raised (unless raise_errors).
+        """
+        remaining = self.submitted + deadline_ms / 1000 - time.perf_counter()
+        try:
+            value = self.future.result(timeout=max(0, remaining))
+        except FutureTimeout:
+            registry.inc('agri_dependency_timeouts_total', dependency=self.stage)
+            record_stage(self.stage, time.perf_counter() - self.submitted, failed=True)
+            print(f"⚠️ {self.stage} missed its {deadline_ms:.0f}ms deadline, using defaults")
+            return default
+        except Exception as e:
+            record_stage(self.stage, self.elapsed or 0, failed=True)
+            if raise_errors:
+                raise
+            print(f"⚠️ {self.stage} failed, using defaults: {e}")
+            return default
+        record_stage(self.stage, self.elapsed)
+        return value
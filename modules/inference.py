@@ -0,0 +1,48 @@
+"""
+Vectorized helpers around the crop model bundle (model + label encoders).
+Shared by the web app, the inference server and batch jobs.
+"""
+
+FIELD_ORDER = ['n', 'p', 'k', 'temperature', 'humidity', 'ph', 'rainfall']
+
+
+def encode_fields(bundle, fields):
+    """
+    Turns a list of field dicts (n, p, k, temperature, humidity, ph, rainfall,
+    soil_type, season, region) into the model's feature matrix in one pass.
+    Raises ValueError for categories the encoders don't know.
+    """
+    import numpy as np
+
+    numeric = np.array([[float(f[name]) for name in FIELD_ORDER] for f in fields], dtype=float)
+    soil = bundle['le_soil'].transform([f['soil_type'] for f in fields])
+    season = bundle['le_season'].transform([f['season'] for f in fields])
+    region = bundle['le_region'].transform([f['region'] for f in fields])
+    return np.column_stack([numeric, soil, season, region])
+
+
+def top_k(bundle, probabilities, k=3):
+    """
+    Returns, for each probability row, the k best crops as
+    [{'name': crop, 'confidence': percent}, ...] sorted by confidence.
+    """
+    import numpy as np
+
+    k = min(k, probabilities.shape[1])
+    # argpartition + sort of k columns beats a full argsort per row
+    idx = np.argpartition(probabilities, -k, axis=1)[:, -k:]
+    rows = np.arange(probabilities.shape[0])[:, None]
+    order = np.argsort(probabilities[rows, idx], axis=1)[:, ::-1]
+    idx = idx[rows, order]
+    names = bundle['le_crop'].inverse_transform(idx.ravel()).reshape(idx.shape)
+    confidences = np.round(probabilities[rows, idx] * 100, 2)
+    return [
+        [{'name': str(name), 'confidence': float(conf)} for name, conf in zip(name_row, conf_row)]
+        for name_row, conf_row in zip(names, confidences)
+    ]
+
+
+def predict_top_k(bundle, fields, k=3):
+    """encode_fields + predict_proba + top_k for a batch of fields."""
+    probabilities = bundle['model'].predict_proba(encode_fields(bundle, fields))
+    return top_k(bundle, probabilities, k)
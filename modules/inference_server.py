@@ -0,0 +1,244 @@
+"""
+Local inference server: one copy of the crop model shared by every gunicorn worker.
+
+Workers send single-row requests over a Unix socket; the server coalesces the
+requests that arrive within a short window into one predict_proba call.
+
+Run:
+    INFERENCE_SOCKET=/tmp/agripredictor-inference.sock python -m modules.inference_server
+and start gunicorn with the same INFERENCE_SOCKET. Workers fall back to
+in-process inference whenever the server is unreachable.
+
+Wire format: 4-byte big-endian length + JSON, in both directions.
+    {"op": "predict", "fields": [{...}], "k": 3} -> {"results": [[{"name", "confidence"}, ...]]}
+    {"op": "classes"} -> {"crops": [...], "soil_types": [...], "seasons": [...], "regions": [...]}
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+DEFAULT_SOCKET = '/tmp/agripredictor-inference.sock'
+HEADER = struct.Struct('>I')
+
+
+def send_message(sock, payload):
+    data = json.dumps(payload).encode()
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    body = _recv_exact(sock, HEADER.unpack(header)[0])
+    return json.loads(body) if body is not None else None
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class MicroBatcher:
+    """
+    Collects pending predict requests and runs them as one batch once
+    `window_ms` has passed since the first request or `max_batch` rows queued.
+    """
+
+    def __init__(self, bundle, window_ms=2, max_batch=64):
+        self.bundle = bundle
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        threading.Thread(target=self._loop, name="micro-batcher", daemon=True).start()
+
+    def submit(self, fields, k):
+        """Blocks until the batch containing these rows is predicted."""
+        job = {'fields': fields, 'k': k, 'done': threading.Event(), 'result': None, 'error': None}
+        self.pending.put(job)
+        job['done'].wait()
+        if job['error']:
+            raise ValueError(job['error'])
+        return job['result']
+
+    def _loop(self):
+        import numpy as np
+        from modules.inference import encode_fields, top_k
+
+        while True:
+            jobs = [self.pending.get()]
+            rows = len(jobs[0]['fields'])
+            deadline = time.perf_counter() + self.window
+            while rows < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self.pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                rows += len(job['fields'])
+
+            # Encode per job so one bad category only fails its own request
+            encoded, valid = [], []
+            for job in jobs:
+                try:
+                    encoded.append(encode_fields(self.bundle, job['fields']))
+                    valid.append(job)
+                except Exception as e:
+                    job['error'] = str(e)
+                    job['done'].set()
+            if not valid:
+                continue
+            try:
+                probabilities = self.bundle['model'].predict_proba(np.vstack(encoded))
+                offset = 0
+                for job, features in zip(valid, encoded):
+                    count = features.shape[0]
+                    job['result'] = top_k(self.bundle, probabilities[offset:offset + count], job['k'])
+                    offset += count
+            except Exception as e:
+                for job in valid:
+                    job['error'] = str(e)
+            self.batches += 1
+            self.rows += rows
+            for job in valid:
+                job['done'].set()
+
+
+class InferenceServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, bundle, window_ms=2, max_batch=64):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.bundle = bundle
+        self.batcher = MicroBatcher(bundle, window_ms, max_batch)
+        super().__init__(socket_path, InferenceHandler)
+        os.chmod(socket_path, 0o660)
+
+
+class InferenceHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+            op = message.get('op')
+            try:
+                if op == 'predict':
+                    reply = {'results': server.batcher.submit(message['fields'], int(message.get('k', 3)))}
+                elif op == 'classes':
+                    reply = {
+                        'crops': sorted(str(c) for c in server.bundle['le_crop'].inverse_transform(
+                            server.bundle['model'].classes_)),
+                        'soil_types': server.bundle['le_soil'].classes_.tolist(),
+                        'seasons': server.bundle['le_season'].classes_.tolist(),
+                        'regions': server.bundle['le_region'].classes_.tolist(),
+                    }
+                elif op == 'stats':
+                    reply = {'batches': server.batcher.batches, 'rows': server.batcher.rows}
+                else:
+                    reply = {'error': f'unknown op: {op}'}
+            except Exception as e:
+                reply = {'error': str(e)}
+            send_message(self.request, reply)
+
+
+class InferenceClient:
+    """
+    Thread-safe client (one persistent connection per thread). The timeout is
+    `timeout` seconds plus `row_timeout` per row, so bulk and sweep batches get
+    the time their predict_proba needs. After a connection failure the server
+    is skipped for `retry_after` seconds so callers fall back fast; a timeout
+    only drops that connection, since the server is up, just busy.
+    """
+
+    def __init__(self, socket_path, timeout=2.0, row_timeout=0.002, retry_after=5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.row_timeout = row_timeout
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._down_until = 0
+        self._classes = None
+
+    def _request(self, payload, rows=1):
+        if time.monotonic() < self._down_until:
+            raise ConnectionError("inference server marked down")
+        sock = getattr(self._local, 'sock', None)
+        try:
+            if sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                self._local.sock = sock
+            sock.settimeout(self.timeout + rows * self.row_timeout)
+            send_message(sock, payload)
+            reply = recv_message(sock)
+            if reply is None:
+                raise ConnectionError("inference server closed the connection")
+        except (OSError, ValueError) as e:
+            # A late reply would be read as the next request's, so the connection goes either way
+            self._local.sock = None
+            if sock is not None:
+                sock.close()
+            if not isinstance(e, TimeoutError):
+                self._down_until = time.monotonic() + self.retry_after
+            raise ConnectionError(str(e) or type(e).__name__) from e
+        if 'error' in reply:
+            raise ValueError(reply['error'])
+        return reply
+
+    def predict(self, fields, k=3):
+        return self._request({'op': 'predict', 'fields': fields, 'k': k}, rows=len(fields))['results']
+
+    def classes(self):
+        if self._classes is None:
+            self._classes = self._request({'op': 'classes'})
+        return self._classes
+
+
+def main():
+    import joblib
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    socket_path = os.environ.get('INFERENCE_SOCKET', DEFAULT_SOCKET)
+    model_path = os.environ.get('MODEL_PATH', os.path.join(base_dir, 'models', 'crop_model.pkl'))
+
+    print(f"⏳ Loading ML Model for inference server: {model_path}")
+    bundle = joblib.load(model_path, mmap_mode='r')
+    server = InferenceServer(
+        socket_path, bundle,
+        window_ms=float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', 2)),
+        max_batch=int(os.environ.get('INFERENCE_MAX_BATCH', 64)),
+    )
+    print(f"✅ Inference server listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Thread-safe lazy initialization for heavy shared resources.
+
+LazyResource(name, loader) runs `loader()` on first use. Under gunicorn's
+threads a cold burst would otherwise load the same model several times at
+once; here the first caller loads while the others wait on a lock and then
+get the same object (single flight). A failed load is remembered for
+`retry_after` seconds, during which callers get the default straight away
+instead of retrying (e.g. a 2 s Mongo connect timeout) on every request.
+"""
+import threading
+import time
+
+from modules.metrics import registry
+
+registry.describe('agri_lazy_load_seconds', 'Time spent loading lazy resources by outcome')
+registry.describe('agri_lazy_loads_total', 'Lazy resource load attempts by outcome')
+registry.describe('agri_lazy_waits_total', 'Callers that waited for another thread to finish a load')
+registry.describe('agri_lazy_failures_cached_total', 'Calls answered from a cached load failure')
+
+
+class LazyResource:
+    def __init__(self, name, loader, retry_after=60):
+        self.name = name
+        self.loader = loader
+        self.retry_after = retry_after
+        self.value = None
+        self.loaded = False
+        self.error = None
+        self.failed_at = None
+        self.load_seconds = None
+        self._lock = threading.Lock()
+
+    def get(self, default=None):
+        """The loaded resource, or `default` while a recent load failure is cached."""
+        if self.loaded:
+            return self.value
+        if not self._lock.acquire(blocking=False):
+            registry.inc('agri_lazy_waits_total', resource=self.name)
+            self._lock.acquire()
+        try:
+            if self.loaded:
+                return self.value
+            if self.error is not None and time.monotonic() - self.failed_at < self.retry_after:
+                registry.inc('agri_lazy_failures_cached_total', resource=self.name)
+                return default
+            return self._load(default)
+        finally:
+            self._lock.release()
+
+    def _load(self, default):
+        start = time.perf_counter()
+        try:
+            value = self.loader()
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            self.error, self.failed_at = e, time.monotonic()
+            registry.observe('agri_lazy_load_seconds', elapsed, resource=self.name, outcome='failed')
+            registry.inc('agri_lazy_loads_total', resource=self.name, outcome='failed')
+            print(f"⚠️ {self.name} failed to load: {e} (retry in {self.retry_after:.0f}s)")
+            return default
+        self.load_seconds = time.perf_counter() - start
+        self.value, self.loaded, self.error = value, True, None
+        registry.observe('agri_lazy_load_seconds', self.load_seconds, resource=self.name, outcome='loaded')
+        registry.inc('agri_lazy_loads_total', resource=self.name, outcome='loaded')
+        return value
+
+    def set(self, value):
+        """Installs an already-built value (a preloaded model, a stand-in)."""
+        with self._lock:
+            self.value, self.loaded, self.error, self.failed_at = value, True, None, None
+
+    def peek(self):
+        """The resource if it is loaded, without loading it."""
+        return self.value if self.loaded else None
+
+    def reset(self, unload=None):
+        """
+        Forgets the resource (and any cached failure) so the next get() loads
+        it again; unload(value) runs under the same lock, never mid-load.
+        """
+        with self._lock:
+            value, was_loaded = self.value, self.loaded
+            # `loaded` goes first: get() reads it without the lock
+            self.loaded = False
+            self.value, self.error, self.failed_at = None, None, None
+            if unload and was_loaded:
+                unload(value)
@@ -0,0 +1,31 @@
+"""
+Cross-process locks for background jobs.
+
+Every gunicorn worker imports wsgi.py and starts the same background threads,
+and cron may run the same job as a script. Jobs that must not overlap take a
+non-blocking flock on a file in LOCK_DIR and skip their round when another
+process holds it. The OS releases the lock if the holder dies.
+"""
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def process_lock(name, blocking=False):
+    """
+    Yields True while holding the lock `name`, or False when another process
+    (or thread) has it; blocking=True waits for it instead.
+    """
+    lock_dir = os.environ.get('LOCK_DIR', tempfile.gettempdir())
+    with open(os.path.join(lock_dir, f'agripredictor-{name}.lock'), 'a') as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,177 @@
+"""
+Memory budget manager for small-RAM instances.
+
+Heavy components (model bundle, chatbot embeddings and API clients, Mongo
+client) and in-process caches register an unload callback. A background
+thread then:
+  - unloads components that haven't been used for `idle_seconds`
+  - when RSS goes above `pressure_ratio` x `budget_mb`, clears caches first
+    and then unloads components, least recently used first, until RSS is
+    back under the line (well before the OOM killer would act)
+Footprints are estimated from the RSS change while a component loads.
+"""
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from modules.metrics import registry
+
+registry.describe('agri_memory_rss_bytes', 'Resident set size of this worker')
+registry.describe('agri_memory_budget_bytes', 'Configured memory budget')
+registry.describe('agri_component_bytes', 'Estimated resident footprint by component')
+registry.describe('agri_component_loaded', 'Whether a component is currently loaded')
+registry.describe('agri_component_unloads_total', 'Component unloads by reason')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _release_freed_memory():
+    gc.collect()
+    # glibc keeps freed arenas mapped; hand them back to the OS
+    try:
+        import ctypes
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class Component:
+    def __init__(self, name, unload, is_loaded, cache=False, idle_seconds=None):
+        self.name = name
+        self.unload = unload
+        self.is_loaded = is_loaded
+        self.cache = cache
+        self.idle_seconds = idle_seconds
+        self.size = 0
+        self.last_used = time.monotonic()
+
+
+class MemoryManager:
+    def __init__(self, budget_mb=450, idle_seconds=900, pressure_ratio=0.85, interval=30):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.idle_seconds = idle_seconds
+        self.pressure_ratio = pressure_ratio
+        self.interval = interval
+        self.components = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        registry.set_gauge('agri_memory_budget_bytes', self.budget)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            budget_mb=float(os.environ.get('MEMORY_BUDGET_MB', 450)),
+            idle_seconds=float(os.environ.get('IDLE_UNLOAD_SECONDS', 900)),
+            pressure_ratio=float(os.environ.get('MEMORY_PRESSURE_RATIO', 0.85)),
+            interval=float(os.environ.get('MEMORY_CHECK_INTERVAL', 30)),
+        )
+
+    def register(self, name, unload, is_loaded, cache=False, idle_seconds=None):
+        """
+        unload() drops the component's references; is_loaded() reports whether
+        there is anything to drop. Caches are never idle-unloaded, only evicted
+        under pressure. idle_seconds=0 disables idle unloading for a component.
+        """
+        self.components[name] = Component(name, unload, is_loaded, cache, idle_seconds)
+
+    def touch(self, name):
+        component = self.components.get(name)
+        if component:
+            component.last_used = time.monotonic()
+
+    @contextmanager
+    def loading(self, name):
+        """Wrap a component's load to record its approximate footprint."""
+        before = current_rss_bytes()
+        try:
+            yield
+        finally:
+            component = self.components.get(name)
+            if component:
+                component.size = max(0, current_rss_bytes() - before)
+                component.last_used = time.monotonic()
+                registry.set_gauge('agri_component_bytes', component.size, component=name)
+
+    def _unload(self, component, reason):
+        try:
+            component.unload()
+        except Exception as e:
+            print(f"⚠️ Unloading {component.name} failed: {e}")
+            return False
+        print(f"🧹 Unloaded {component.name} ({reason}, ~{component.size / 1048576:.0f} MB)")
+        registry.inc('agri_component_unloads_total', component=component.name, reason=reason)
+        component.size = 0
+        registry.set_gauge('agri_component_bytes', 0, component=component.name)
+        return True
+
+    def check(self):
+        """One pass of idle unloading and pressure eviction; returns the names unloaded."""
+        unloaded = []
+        with self._lock:
+            now = time.monotonic()
+            for component in self.components.values():
+                idle_limit = self.idle_seconds if component.idle_seconds is None else component.idle_seconds
+                if (not component.cache and idle_limit and component.is_loaded()
+                        and now - component.last_used > idle_limit
+                        and self._unload(component, 'idle')):
+                    unloaded.append(component.name)
+            if unloaded:
+                _release_freed_memory()
+
+            # Pressure: caches first, then least recently used components
+            limit = self.budget * self.pressure_ratio
+            if current_rss_bytes() > limit:
+                victims = sorted((c for c in self.components.values() if c.is_loaded()),
+                                 key=lambda c: (not c.cache, c.last_used))
+                for component in victims:
+                    if self._unload(component, 'pressure'):
+                        unloaded.append(component.name)
+                        _release_freed_memory()
+                    if current_rss_bytes() <= limit:
+                        break
+
+            rss = current_rss_bytes()
+            registry.set_gauge('agri_memory_rss_bytes', rss)
+            for component in self.components.values():
+                registry.set_gauge('agri_component_loaded', int(bool(component.is_loaded())), component=component.name)
+        return unloaded
+
+    def usage(self):
+        now = time.monotonic()
+        return {
+            'rss_mb': round(current_rss_bytes() / 1048576, 1),
+            'budget_mb': round(self.budget / 1048576, 1),
+            'pressure_mb': round(self.budget * self.pressure_ratio / 1048576, 1),
+            'components': {
+                c.name: {
+                    'loaded': bool(c.is_loaded()),
+                    'size_mb': round(c.size / 1048576, 1),
+                    'idle_seconds': round(now - c.last_used),
+                    'cache': c.cache,
+                } for c in self.components.values()
+            },
+        }
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Memory check failed: {e}")
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="memory-manager", daemon=True)
+            self._thread.start()
@@ -0,0 +1,168 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds (Prometheus 'le' bounds)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe counters/gauges/histograms rendered in Prometheus text format.
+    Metrics are keyed by (name, sorted label items) so recording is a dict lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    @staticmethod
+    def _format_labels(labels, extra=None):
+        items = list(labels) + (extra or [])
+        if not items:
+            return ''
+        return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+    def render(self):
+        """Returns all metrics in Prometheus text exposition format (v0.0.4)."""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: (hist.buckets, list(hist.counts), hist.sum, hist.count)
+                          for key, hist in self._histograms.items()}
+
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, 'counter')
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            header(name, 'gauge')
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+        for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{self._format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{self._format_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {total}")
+            lines.append(f"{name}_count{self._format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+registry.describe('agri_stage_duration_seconds', 'Time spent in a named request stage')
+registry.describe('agri_stage_errors_total', 'Stages that raised an exception')
+registry.describe('agri_request_duration_seconds', 'End-to-end request latency by route')
+registry.describe('agri_requests_total', 'Requests served by route and status')
+
+# Stage timings of the request currently running on this thread
+_request_state = threading.local()
+
+
+def start_request():
+    _request_state.stages = []
+
+
+def get_request_stages():
+    """Returns [(stage, seconds), ...] recorded so far for the current request."""
+    return getattr(_request_state, 'stages', [])
+
+
+def current_stages():
+    """The current request's stage list (or None), to hand to a worker thread."""
+    return getattr(_request_state, 'stages', None)
+
+
+@contextmanager
+def bind_stages(stages):
+    """Spans recorded inside the block go to `stages`, a list from another thread's current_stages()."""
+    previous = getattr(_request_state, 'stages', None)
+    _request_state.stages = stages
+    try:
+        yield
+    finally:
+        _request_state.stages = previous
+
+
+def record_stage(stage, elapsed, failed=False):
+    """Records a stage timed elsewhere (e.g. on a worker thread) for the current request."""
+    if failed:
+        registry.inc('agri_stage_errors_total', stage=stage)
+    registry.observe('agri_stage_duration_seconds', elapsed, stage=stage)
+    stages = getattr(_request_state, 'stages', None)
+    if stages is not None:
+        stages.append((stage, elapsed))
+
+
+@contextmanager
+def span(stage):
+    """
+    Times a block as a named stage, e.g. `with span('predict_proba'): ...`.
+    Records into the stage histogram and the current request's stage list.
+    """
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - start, failed)
+
+
+def record_request(route, method, status, elapsed):
+    registry.observe('agri_request_duration_seconds', elapsed, route=route, method=method)
+    registry.inc('agri_requests_total', route=route, method=method, status=status)
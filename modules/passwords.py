@@ -0,0 +1,91 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+# werkzeug 3 default; pbkdf2 example: 'pbkdf2:sha256:600000'
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+def normalize_method(method):
+    """The method with werkzeug's defaults filled in, as it writes it into the hash."""
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return DEFAULT_METHOD
+    if name == 'pbkdf2' and len(args) < 2:
+        hash_name = args[0] if args else 'sha256'
+        return f"pbkdf2:{hash_name}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasher:
+    """
+    Runs werkzeug hashing in a small process pool so scrypt/pbkdf2 CPU time
+    doesn't hold the GIL of the web worker. workers=0 hashes inline.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=2, timeout=10):
+        self.method = method
+        self._prefix = normalize_method(method)
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            method=os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+            workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+        )
+
+    def _get_pool(self):
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a multi-threaded gunicorn worker is unsafe
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+                atexit.register(self._pool.shutdown, wait=False)
+            return self._pool
+
+    def _run(self, fn, *args):
+        pool = self._get_pool()
+        if pool is not None:
+            future = None
+            try:
+                future = pool.submit(fn, *args)
+                return future.result(timeout=self.timeout)
+            except FuturesTimeoutError:
+                # The pool is alive but backed up; don't keep the user waiting on it
+                future.cancel()
+                print(f"⚠️ Hash pool busy for {self.timeout}s, hashing inline")
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                # RuntimeError: the spawned workers couldn't start (or the pool is shut down)
+                print(f"⚠️ Hash pool unavailable, hashing inline: {e}")
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = None
+        return fn(*args)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True when the stored hash was made with different algorithm parameters."""
+        return stored_hash.split('$', 1)[0] != self._prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
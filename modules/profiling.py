@@ -0,0 +1,177 @@
+import cProfile
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+MAX_STACK_DEPTH = 64
+
+
+class RequestProfiler:
+    """
+    Captures profiles of slow requests without a debugger or redeploy.
+
+    - Sampling: a random `sample_rate` share of requests is watched. While one
+      runs, a single background thread samples its stack every `interval_ms`
+      (the thread sleeps when no watched request is in flight). If the request
+      ends up slower than `slow_ms`, the collapsed stacks are written out;
+      otherwise they are discarded.
+    - Armed: `arm(route, count)` runs the next `count` requests to `route` under
+      cProfile and always writes the .prof file.
+
+    Captures go to `output_dir` together with route and stage timings; only the
+    newest `keep` captures are kept.
+    """
+
+    def __init__(self, output_dir, slow_ms=2000, keep=50, interval_ms=10, sample_rate=0.05):
+        self.output_dir = output_dir
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._armed = {}
+        self._active = {}
+        self._sampler = None
+        self._wake = threading.Event()
+
+    @classmethod
+    def from_env(cls, base_dir):
+        return cls(
+            output_dir=os.environ.get('PROFILE_DIR', os.path.join(base_dir, 'profiles')),
+            slow_ms=float(os.environ.get('SLOW_REQUEST_MS', 2000)),
+            keep=int(os.environ.get('PROFILE_KEEP', 50)),
+            interval_ms=float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 10)),
+            sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0.05)),
+        )
+
+    # ---------- Arming ----------
+    def arm(self, route, count):
+        with self._lock:
+            self._armed[route] = self._armed.get(route, 0) + count
+            return dict(self._armed)
+
+    def armed(self):
+        with self._lock:
+            return dict(self._armed)
+
+    def _take_armed(self, route):
+        with self._lock:
+            remaining = self._armed.get(route, 0)
+            if remaining <= 0:
+                return False
+            if remaining == 1:
+                del self._armed[route]
+            else:
+                self._armed[route] = remaining - 1
+            return True
+
+    # ---------- Request hooks ----------
+    def begin(self, route):
+        """Returns a handle to pass to end(), or None when nothing is captured."""
+        if self._take_armed(route):
+            profile = cProfile.Profile()
+            profile.enable()
+            return {'route': route, 'kind': 'cprofile', 'profile': profile}
+        if self.slow_ms <= 0 or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+
+        thread_id = threading.get_ident()
+        samples = Counter()
+        with self._lock:
+            self._active[thread_id] = samples
+            self._wake.set()
+            self._ensure_sampler()
+        return {'route': route, 'kind': 'sampled', 'thread_id': thread_id, 'samples': samples}
+
+    def end(self, handle, method, status, elapsed, stages):
+        if handle is None:
+            return
+        elapsed_ms = elapsed * 1000
+        if handle['kind'] == 'cprofile':
+            handle['profile'].disable()
+            self._write(handle, method, status, elapsed_ms, stages)
+            return
+
+        with self._lock:
+            self._active.pop(handle['thread_id'], None)
+        if elapsed_ms >= self.slow_ms:
+            self._write(handle, method, status, elapsed_ms, stages)
+
+    # ---------- Sampling ----------
+    def _ensure_sampler(self):
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(target=self._sample_loop, name="request-sampler", daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self):
+        while True:
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    self._wake.clear()
+            if not active:
+                # Parked until begin() registers a request
+                self._wake.wait()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for thread_id, samples in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    # ---------- Output ----------
+    def _write(self, handle, method, status, elapsed_ms, stages):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            slug = re.sub(r'[^A-Za-z0-9]+', '_', handle['route']).strip('_') or 'root'
+            stem = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{slug}_{int(elapsed_ms)}ms"
+            meta = {
+                'route': handle['route'],
+                'method': method,
+                'status': status,
+                'kind': handle['kind'],
+                'elapsed_ms': round(elapsed_ms, 2),
+                'stages_ms': [[name, round(seconds * 1000, 2)] for name, seconds in stages],
+                'captured_at': datetime.utcnow().isoformat(),
+            }
+            if handle['kind'] == 'cprofile':
+                handle['profile'].dump_stats(os.path.join(self.output_dir, stem + '.prof'))
+                meta['profile'] = stem + '.prof'
+            else:
+                # Folded stacks: open with flamegraph.pl or speedscope
+                with open(os.path.join(self.output_dir, stem + '.folded'), 'w') as f:
+                    for stack, count in handle['samples'].most_common():
+                        f.write(f"{stack} {count}\n")
+                meta['profile'] = stem + '.folded'
+                meta['samples'] = sum(handle['samples'].values())
+            with open(os.path.join(self.output_dir, stem + '.json'), 'w') as f:
+                json.dump(meta, f, indent=2)
+            print(f"🐢 Slow request captured: {handle['route']} {int(elapsed_ms)}ms -> {stem}")
+            self._rotate()
+        except Exception as e:
+            print(f"⚠️ Profile capture failed: {e}")
+
+    def _rotate(self):
+        metas = sorted(f for f in os.listdir(self.output_dir) if f.endswith('.json'))
+        for old in metas[:max(0, len(metas) - self.keep)]:
+            stem = old[:-len('.json')]
+            for ext in ('.json', '.prof', '.folded'):
+                path = os.path.join(self.output_dir, stem + ext)
+                if os.path.exists(path):
+                    os.remove(path)
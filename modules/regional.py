@@ -0,0 +1,173 @@
+"""
+Cross-user regional analytics: region x season x soil cubes over all predictions.
+
+RegionalAggregator.run() folds predictions newer than its watermark (the last
+aggregated Prediction.id) into one cube row per (region, season, soil_type),
+batch by batch. Each batch is claimed by moving the watermark with a
+conditional UPDATE (only if it still has the value the batch was read from) in
+the same transaction as the fold, so two runs can never fold the same rows;
+runs are also serialized across processes by a file lock. Each run only reads
+new rows, so it can be scheduled every few minutes. query() merges the
+small cube table into region x season cells (top crops, average risks, soil
+mix) without touching the Prediction table.
+"""
+import json
+import os
+from collections import defaultdict
+
+from sqlalchemy.exc import IntegrityError
+
+from modules.analytics import RANK_WEIGHTS
+from modules.locks import process_lock
+
+WATERMARK_NAME = 'region_cube'
+# Batches retried after losing a race (another run moved the watermark or created a cube row)
+MAX_CONFLICTS = 3
+
+
+class RegionalAggregator:
+    def __init__(self, db, prediction_model, cube_model, state_model, batch_size=2000):
+        self.db = db
+        self.Prediction = prediction_model
+        self.Cube = cube_model
+        self.State = state_model
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_env(cls, db, prediction_model, cube_model, state_model):
+        return cls(db, prediction_model, cube_model, state_model,
+                   batch_size=int(os.environ.get('AGGREGATION_BATCH_SIZE', 2000)))
+
+    def _ensure_state(self):
+        """Creates the watermark row on first use; a concurrent creator winning is fine."""
+        if self.db.session.get(self.State, WATERMARK_NAME) is not None:
+            return
+        try:
+            self.db.session.add(self.State(name=WATERMARK_NAME, last_id=0))
+            self.db.session.commit()
+        except IntegrityError:
+            self.db.session.rollback()
+
+    def watermark(self):
+        last_id = (self.db.session.query(self.State.last_id)
+                   .filter(self.State.name == WATERMARK_NAME).scalar())
+        return last_id or 0
+
+    def _claim(self, old, new):
+        """Moves the watermark from `old` to `new` in the current transaction; False if it moved already."""
+        return self.State.query.filter(self.State.name == WATERMARK_NAME, self.State.last_id == old) \
+            .update({'last_id': new}, synchronize_session=False) == 1
+
+    def _fold(self, rows):
+        groups = defaultdict(list)
+        for row in rows:
+            groups[(row.region, row.season, row.soil_type)].append(row)
+        for (region, season, soil_type), cell_rows in groups.items():
+            cube = self.Cube.query.filter_by(region=region, season=season, soil_type=soil_type).first()
+            if cube is None:
+                cube = self.Cube(region=region, season=season, soil_type=soil_type, predictions=0,
+                                 drought_risk_sum=0, flood_risk_sum=0, crop_ranks='{}')
+                self.db.session.add(cube)
+            ranks = json.loads(cube.crop_ranks or '{}')
+            for row in cell_rows:
+                cube.predictions += 1
+                cube.drought_risk_sum += row.drought_risk or 0
+                cube.flood_risk_sum += row.flood_risk or 0
+                for rank, crop in enumerate((row.crop1, row.crop2, row.crop3)):
+                    if crop:
+                        ranks.setdefault(crop, [0, 0, 0])[rank] += 1
+            cube.crop_ranks = json.dumps(ranks, sort_keys=True)
+
+    def run(self, max_batches=None, wait=False):
+        """
+        Aggregates every prediction past the watermark; returns the number of
+        rows folded (0 if another process is aggregating, unless `wait`).
+        """
+        with process_lock('regional-aggregation', blocking=wait) as held:
+            return self._run_batches(max_batches) if held else 0
+
+    def _run_batches(self, max_batches):
+        P = self.Prediction
+        self._ensure_state()
+        total = batches = conflicts = 0
+        while max_batches is None or batches < max_batches:
+            last_id = self.watermark()
+            rows = P.query.filter(P.id > last_id).order_by(P.id).limit(self.batch_size).all()
+            if not rows:
+                self.db.session.commit()
+                break
+            try:
+                claimed = self._claim(last_id, rows[-1].id)
+                if claimed:
+                    self._fold(rows)
+                    self.db.session.commit()
+            except IntegrityError:
+                # Another run created one of the cube rows first
+                claimed = False
+            except Exception:
+                self.db.session.rollback()
+                raise
+            if not claimed:
+                # Lost a race; re-read the watermark and cubes and try again
+                self.db.session.rollback()
+                conflicts += 1
+                if conflicts > MAX_CONFLICTS:
+                    break
+                continue
+            total += len(rows)
+            batches += 1
+            if len(rows) < self.batch_size:
+                break
+        return total
+
+    def rebuild(self):
+        """Drops the cubes and re-aggregates from the rows still in the Prediction table."""
+        with process_lock('regional-aggregation', blocking=True):
+            self._ensure_state()
+            self.Cube.query.delete()
+            self.State.query.filter(self.State.name == WATERMARK_NAME).update({'last_id': 0})
+            self.db.session.commit()
+            return self._run_batches(None)
+
+    def query(self, regions=None, seasons=None, soil_types=None, top=3):
+        """
+        Region x season cells for the given filters (None = all), merged across
+        the selected soil types, plus the values available for each filter.
+        """
+        cubes = self.Cube.query.all()
+        options = {
+            'regions': sorted({c.region for c in cubes}),
+            'seasons': sorted({c.season for c in cubes}),
+            'soil_types': sorted({c.soil_type for c in cubes}),
+        }
+        cells = {}
+        for cube in cubes:
+            if ((regions and cube.region not in regions) or (seasons and cube.season not in seasons)
+                    or (soil_types and cube.soil_type not in soil_types)):
+                continue
+            cell = cells.setdefault((cube.region, cube.season), {
+                'region': cube.region, 'season': cube.season, 'predictions': 0,
+                'drought_risk_sum': 0.0, 'flood_risk_sum': 0.0, 'crops': defaultdict(float), 'soil_mix': {},
+            })
+            cell['predictions'] += cube.predictions
+            cell['drought_risk_sum'] += cube.drought_risk_sum
+            cell['flood_risk_sum'] += cube.flood_risk_sum
+            cell['soil_mix'][cube.soil_type] = cell['soil_mix'].get(cube.soil_type, 0) + cube.predictions
+            for crop, ranks in json.loads(cube.crop_ranks).items():
+                cell['crops'][crop] += sum(count * w for count, w in zip(ranks, RANK_WEIGHTS))
+
+        results = []
+        for cell in sorted(cells.values(), key=lambda c: (c['region'], c['season'])):
+            count = cell['predictions'] or 1
+            top_crops = sorted(cell['crops'].items(), key=lambda item: item[1], reverse=True)[:top]
+            results.append({
+                'region': cell['region'],
+                'season': cell['season'],
+                'predictions': cell['predictions'],
+                'avg_drought_risk': round(cell['drought_risk_sum'] / count, 1),
+                'avg_flood_risk': round(cell['flood_risk_sum'] / count, 1),
+                'top_crops': [{'name': name, 'score': round(score, 1)} for name, score in top_crops],
+                'soil_mix': [{'soil': soil, 'share': round(n * 100 / count, 1)}
+                             for soil, n in sorted(cell['soil_mix'].items(), key=lambda item: -item[1])],
+            })
+        return {'options': options, 'cells': results}
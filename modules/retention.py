@@ -0,0 +1,203 @@
+"""
+Prediction retention: keeps the Prediction table to recent rows.
+
+Rows older than `max_age_days` are processed in small batches, one short
+transaction per batch. For each batch:
+  1. the raw rows are appended to a gzip JSONL archive (one file per month) and fsynced
+  2. they are folded into one PredictionSummary row per (user, day)
+  3. they are deleted, in the same transaction as the summary update
+Each batch is claimed by deleting its rows first: if another run already took
+some of them the transaction is rolled back before anything is archived. Whole
+runs are also serialized across processes (web workers, cron) by a file lock.
+Between batches the job pauses so web requests can take the SQLite write lock.
+The newest prediction is never compacted: without AUTOINCREMENT SQLite hands
+out max(id) + 1, so deleting it would let new rows reuse ids already behind
+the regional aggregation watermark.
+Once the database is in incremental auto-vacuum mode, freed pages are returned
+to the OS a few at a time after each batch.
+"""
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from modules.locks import process_lock
+
+ARCHIVE_COLUMNS = ('id', 'user_id', 'n', 'p', 'k', 'temperature', 'humidity', 'ph', 'rainfall',
+                   'soil_type', 'season', 'region', 'crop1', 'confidence1', 'crop2', 'confidence2',
+                   'crop3', 'confidence3', 'drought_risk', 'flood_risk', 'created_at')
+
+
+class PredictionRetention:
+    def __init__(self, db, prediction_model, summary_model, archive_dir, max_age_days=90,
+                 batch_size=500, pause_ms=50, vacuum_pages=200):
+        self.db = db
+        self.Prediction = prediction_model
+        self.Summary = summary_model
+        self.archive_dir = archive_dir
+        self.max_age_days = max_age_days
+        self.batch_size = batch_size
+        self.pause = pause_ms / 1000
+        self.vacuum_pages = vacuum_pages
+
+    @classmethod
+    def from_env(cls, db, prediction_model, summary_model, base_dir):
+        return cls(
+            db, prediction_model, summary_model,
+            archive_dir=os.environ.get('ARCHIVE_DIR', os.path.join(base_dir, 'archive')),
+            max_age_days=int(os.environ.get('PREDICTION_RETENTION_DAYS', 90)),
+            batch_size=int(os.environ.get('RETENTION_BATCH_SIZE', 500)),
+            pause_ms=float(os.environ.get('RETENTION_PAUSE_MS', 50)),
+            vacuum_pages=int(os.environ.get('RETENTION_VACUUM_PAGES', 200)),
+        )
+
+    # ---------------- SQLite housekeeping ----------------
+    def _is_sqlite(self):
+        return self.db.engine.dialect.name == 'sqlite'
+
+    def auto_vacuum_mode(self):
+        """0 = none, 1 = full, 2 = incremental (None if not SQLite)."""
+        if not self._is_sqlite():
+            return None
+        return self.db.session.execute(text('PRAGMA auto_vacuum')).scalar()
+
+    def enable_incremental_vacuum(self):
+        """
+        One-off switch to incremental auto-vacuum. Needs a full VACUUM, which
+        rewrites the file and blocks writers, so run it during a quiet period.
+        """
+        if not self._is_sqlite() or self.auto_vacuum_mode() == 2:
+            return False
+        self.db.session.commit()
+        with self.db.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+            conn.execute(text('PRAGMA auto_vacuum = INCREMENTAL'))
+            conn.execute(text('VACUUM'))
+        return True
+
+    def reclaim(self):
+        """Frees up to `vacuum_pages` pages; a no-op unless incremental auto-vacuum is on."""
+        if self.vacuum_pages <= 0 or self.auto_vacuum_mode() != 2:
+            return 0
+        free_before = self.db.session.execute(text('PRAGMA freelist_count')).scalar()
+        self.db.session.commit()
+        # The pragma frees one page per step; executescript steps it to completion
+        with self.db.engine.connect() as conn:
+            conn.connection.driver_connection.executescript(f'PRAGMA incremental_vacuum({int(self.vacuum_pages)});')
+        free_after = self.db.session.execute(text('PRAGMA freelist_count')).scalar()
+        return free_before - free_after
+
+    # ---------------- Compaction ----------------
+    def _archive(self, rows):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        by_month = defaultdict(list)
+        for row in rows:
+            by_month[row.created_at.strftime('%Y-%m')].append(row)
+        for month, month_rows in by_month.items():
+            path = os.path.join(self.archive_dir, f'predictions-{month}.jsonl.gz')
+            # Appending creates a new gzip member; multi-member files read back as one stream
+            with open(path, 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='ab') as f:
+                    for row in month_rows:
+                        record = {c: getattr(row, c) for c in ARCHIVE_COLUMNS}
+                        record['created_at'] = row.created_at.isoformat()
+                        f.write((json.dumps(record) + '\n').encode())
+                raw.flush()
+                os.fsync(raw.fileno())
+
+    def _fold(self, rows):
+        groups = defaultdict(list)
+        for row in rows:
+            groups[(row.user_id, row.created_at.date())].append(row)
+        for (user_id, day), day_rows in groups.items():
+            summary = self.Summary.query.filter_by(user_id=user_id, day=day).first()
+            if summary is None:
+                summary = self.Summary(user_id=user_id, day=day, predictions=0, recommendations=0,
+                                       confidence1_sum=0, drought_risk_max=0, flood_risk_max=0,
+                                       crop_ranks='{}')
+                self.db.session.add(summary)
+            ranks = json.loads(summary.crop_ranks or '{}')
+            for row in day_rows:
+                summary.predictions += 1
+                summary.confidence1_sum += row.confidence1 or 0
+                summary.drought_risk_max = max(summary.drought_risk_max, row.drought_risk or 0)
+                summary.flood_risk_max = max(summary.flood_risk_max, row.flood_risk or 0)
+                for rank, crop in enumerate((row.crop1, row.crop2, row.crop3)):
+                    if crop:
+                        summary.recommendations += 1
+                        ranks.setdefault(crop, [0, 0, 0])[rank] += 1
+            summary.crop_ranks = json.dumps(ranks, sort_keys=True)
+
+    def _compactable(self, cutoff):
+        """Rows past the cutoff, except the newest prediction overall (keeps ids from being reused)."""
+        P = self.Prediction
+        newest = self.db.session.query(self.db.func.max(P.id)).scalar_subquery()
+        return P.query.filter(P.created_at < cutoff, P.id < newest)
+
+    def compact_batch(self, cutoff, dry_run=False):
+        """Archives, folds and deletes one batch; returns the number of rows handled."""
+        P = self.Prediction
+        rows = (self._compactable(cutoff)
+                .order_by(P.created_at, P.id)
+                .limit(self.batch_size).all())
+        if not rows or dry_run:
+            self.db.session.rollback()
+            return len(rows)
+        try:
+            ids = [row.id for row in rows]
+            deleted = P.query.filter(P.id.in_(ids)).delete(synchronize_session=False)
+            if deleted != len(ids):
+                # Another run compacted part of this batch first; leave it to that run
+                self.db.session.rollback()
+                return 0
+            self._archive(rows)
+            self._fold(rows)
+            self.db.session.commit()
+        except Exception:
+            # The rows stay in the table; a retry may archive them twice (lines carry the row id)
+            self.db.session.rollback()
+            raise
+        return len(rows)
+
+    def run(self, now=None, max_batches=None, dry_run=False):
+        """
+        Compacts everything older than the cutoff; returns run statistics
+        ('skipped' is True when another process is already compacting).
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.max_age_days)
+        stats = {'cutoff': cutoff.isoformat(), 'rows': 0, 'batches': 0, 'pages_freed': 0, 'skipped': False}
+        start = time.perf_counter()
+        with process_lock('retention') as held:
+            if held:
+                self._run_batches(cutoff, stats, max_batches, dry_run)
+            else:
+                stats['skipped'] = True
+        stats['seconds'] = round(time.perf_counter() - start, 2)
+        return stats
+
+    def _run_batches(self, cutoff, stats, max_batches, dry_run):
+        while max_batches is None or stats['batches'] < max_batches:
+            handled = self.compact_batch(cutoff, dry_run=dry_run)
+            if not handled:
+                break
+            stats['batches'] += 1
+            stats['rows'] += handled
+            if dry_run:
+                stats['rows'] = self._compactable(cutoff).count()
+                break
+            stats['pages_freed'] += self.reclaim()
+            if handled < self.batch_size:
+                break
+            time.sleep(self.pause)
+
+
+def read_archive(path):
+    """Yields the archived prediction dicts from one predictions-YYYY-MM.jsonl.gz file."""
+    with gzip.open(path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
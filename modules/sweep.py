@@ -0,0 +1,144 @@
+"""
+What-if sensitivity sweeps over the crop model.
+
+A sweep varies one or two numeric inputs of a base field over a grid, e.g.
+N from 0 to 150 and rainfall from -30% to +30%, and returns each crop's
+probability at every grid point. The whole grid is one feature matrix (the
+base row repeated, swept columns overwritten) and one predict_proba call.
+"""
+from modules.bulk import NUMERIC_FIELDS, TEXT_FIELDS
+from modules.inference import FIELD_ORDER, encode_fields
+
+# Sweeps are clipped to physically meaningful values
+VARIABLE_BOUNDS = {
+    'n': (0, 300), 'p': (0, 300), 'k': (0, 300),
+    'temperature': (-5, 50), 'humidity': (0, 100), 'ph': (3, 10), 'rainfall': (0, 5000),
+}
+MAX_STEPS = 101
+# More than any crop list; top_k clamps it to the number of classes
+ALL_CROPS = 1000
+
+
+def parse_field(data):
+    """The base field from a JSON object; raises ValueError naming the bad input."""
+    if not isinstance(data, dict):
+        raise ValueError("field must be an object")
+    field = {}
+    for name in NUMERIC_FIELDS:
+        try:
+            field[name] = float(data[name])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"field.{name} must be a number")
+    for name in TEXT_FIELDS:
+        if not data.get(name):
+            raise ValueError(f"field.{name} is required")
+        field[name] = str(data[name])
+    return field
+
+
+def parse_axes(field, specs, max_points):
+    """
+    Grid axes as [(variable, [values...]), ...] from one or two specs:
+      {"variable": "n", "min": 0, "max": 150, "steps": 16}
+      {"variable": "rainfall", "change_pct": [-30, 30], "steps": 13}   (relative to the base field)
+    """
+    if not isinstance(specs, list) or not 1 <= len(specs) <= 2 or not all(isinstance(s, dict) for s in specs):
+        raise ValueError("axes must list one or two variables as objects")
+    axes = []
+    for spec in specs:
+        name = str(spec.get('variable', '')).lower()
+        if name not in VARIABLE_BOUNDS:
+            raise ValueError(f"variable must be one of {', '.join(VARIABLE_BOUNDS)}")
+        if name in (axis[0] for axis in axes):
+            raise ValueError(f"{name} is swept twice")
+        try:
+            steps = int(spec.get('steps', 11))
+            if 'change_pct' in spec:
+                low_pct, high_pct = (float(v) for v in spec['change_pct'])
+                low, high = field[name] * (1 + low_pct / 100), field[name] * (1 + high_pct / 100)
+            else:
+                low, high = float(spec['min']), float(spec['max'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{name} needs min/max or change_pct [low, high], and integer steps")
+        if not 2 <= steps <= MAX_STEPS:
+            raise ValueError(f"steps must be between 2 and {MAX_STEPS}")
+        floor, ceiling = VARIABLE_BOUNDS[name]
+        low, high = max(floor, min(low, high)), min(ceiling, max(low, high))
+        values = sorted({round(low + (high - low) * i / (steps - 1), 2) for i in range(steps)})
+        axes.append((name, values))
+
+    points = 1
+    for _, values in axes:
+        points *= len(values)
+    if points > max_points:
+        raise ValueError(f"grid has {points} points, the limit is {max_points}")
+    return axes
+
+
+def grid_overrides(axes):
+    """{variable: column of values}, one entry per grid point (first axis varies slowest)."""
+    import numpy as np
+
+    mesh = np.meshgrid(*[np.asarray(values, dtype=float) for _, values in axes], indexing='ij')
+    return {name: column.ravel() for (name, _), column in zip(axes, mesh)}
+
+
+def expand_fields(field, overrides):
+    """One field dict per grid point, for predictors that take dicts."""
+    count = len(next(iter(overrides.values())))
+    return [dict(field, **{name: float(column[i]) for name, column in overrides.items()}) for i in range(count)]
+
+
+def probability_matrix(bundle, field, overrides):
+    """
+    (crop names, probabilities with one row per grid point) from a single
+    predict_proba call: the base row is encoded once and the swept columns
+    are overwritten in place.
+    """
+    import numpy as np
+
+    count = len(next(iter(overrides.values())))
+    features = np.repeat(encode_fields(bundle, [field]), count, axis=0)
+    for name, column in overrides.items():
+        features[:, FIELD_ORDER.index(name)] = column
+    model = bundle['model']
+    crops = [str(c) for c in bundle['le_crop'].inverse_transform(model.classes_)]
+    return crops, model.predict_proba(features)
+
+
+def ranked_to_matrix(ranked_rows):
+    """(crop names, probabilities) from per-row [{'name', 'confidence'}] lists; unlisted crops get 0."""
+    import numpy as np
+
+    crops = sorted({crop['name'] for row in ranked_rows for crop in row})
+    column = {name: i for i, name in enumerate(crops)}
+    matrix = np.zeros((len(ranked_rows), len(crops)))
+    for i, row in enumerate(ranked_rows):
+        for crop in row:
+            matrix[i, column[crop['name']]] = crop['confidence'] / 100
+    return crops, matrix
+
+
+def summarize(axes, crops, probabilities, top=8, include=()):
+    """
+    JSON-ready surface: the grid values, the best crop at each point and, for
+    the `top` crops by peak probability (plus any in `include`), their
+    probability in percent at each point, shaped like the grid.
+    """
+    import numpy as np
+
+    shape = [len(values) for _, values in axes]
+    peaks = probabilities.max(axis=0)
+    order = [int(i) for i in np.argsort(-peaks)]
+    chosen = order[:top] + [i for i in order[top:] if crops[i] in include]
+    best = np.asarray(crops, dtype=object)[probabilities.argmax(axis=1)]
+    return {
+        'variables': [{'name': name, 'values': values} for name, values in axes],
+        'shape': shape,
+        'best': best.reshape(shape).tolist(),
+        'crops': [{
+            'name': crops[i],
+            'peak': round(float(peaks[i]) * 100, 1),
+            'probability': np.round(probabilities[:, i] * 100, 1).reshape(shape).tolist(),
+        } for i in chosen],
+    }
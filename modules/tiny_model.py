@@ -0,0 +1,63 @@
+"""
+Pure-Python runtime for the distilled crop model (models/crop_model_tiny.json).
+
+The artifact is a shallow regression tree, built by distill_model.py, that
+mimics the full model's class probabilities. Each leaf stores only its top-3
+crops. Loading it needs no numpy/sklearn and takes milliseconds, so it is the
+low-memory fallback when crop_model.pkl can't be loaded. Only an artifact
+distilled from crop_model.pkl itself is shipped: its category and crop lists
+are the production encoders'.
+"""
+import json
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TINY_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'crop_model_tiny.json')
+
+NUMERIC_FIELDS = ('n', 'p', 'k', 'temperature', 'humidity', 'ph', 'rainfall')
+
+
+class TinyCropModel:
+    def __init__(self, artifact):
+        self.crops = artifact['crops']
+        self.soil_types = artifact['soil_types']
+        self.seasons = artifact['seasons']
+        self.regions = artifact['regions']
+        self.tree = artifact['tree']
+        self.metadata = artifact.get('metadata', {})
+
+    @classmethod
+    def load(cls, path=TINY_MODEL_PATH):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _code(classes, value):
+        # Unknown categories are rejected, as LabelEncoder does on the ML path
+        try:
+            return classes.index(value)
+        except ValueError:
+            raise ValueError(f"y contains previously unseen labels: '{value}'") from None
+
+    def _features(self, n, p, k, temperature, humidity, ph, rainfall, soil_type, season, region):
+        return [float(n), float(p), float(k), float(temperature), float(humidity), float(ph), float(rainfall),
+                self._code(self.soil_types, soil_type),
+                self._code(self.seasons, season),
+                self._code(self.regions, region)]
+
+    def _leaf(self, features):
+        # Internal node: [feature, threshold, left, right]; leaf: [[crop idx...], [confidence...]]
+        node = self.tree
+        while len(node) == 4:
+            feature, threshold, left, right = node
+            node = left if features[feature] <= threshold else right
+        return node
+
+    def predict_crops(self, n, p, k, temperature, humidity, ph, rainfall, soil_type, season, region):
+        """
+        Same interface and output as simple_predictor.predict_crops_simple:
+        top 3 crops as [{'name': ..., 'confidence': percent}, ...].
+        """
+        indices, confidences = self._leaf(
+            self._features(n, p, k, temperature, humidity, ph, rainfall, soil_type, season, region))
+        return [{'name': self.crops[i], 'confidence': round(c, 2)} for i, c in zip(indices, confidences)]
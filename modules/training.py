@@ -0,0 +1,74 @@
+import json
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(BASE_DIR, 'models', 'crop.csv.csv')
+ENCODINGS_PATH = os.path.join(BASE_DIR, 'models', 'encodings.json')
+
+NUMERIC_FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+CATEGORICAL_FEATURES = ['soil_type', 'season', 'region']
+
+
+def load_encodings():
+    with open(ENCODINGS_PATH) as f:
+        return json.load(f)
+
+
+def load_crop_dataset(path=None, seed=42):
+    """
+    Loads the crop CSV as a DataFrame with the same columns the app feeds the model.
+    The CSV has no soil/season/region columns, so they are filled deterministically
+    from encodings.json to give the bundle its full feature shape.
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(path or DATASET_PATH)
+    df['label'] = df['label'].str.capitalize()
+
+    encodings = load_encodings()
+    rng = np.random.default_rng(seed)
+    df['soil_type'] = rng.choice(encodings['soil_types'], size=len(df))
+    df['season'] = rng.choice(encodings['seasons'], size=len(df))
+    df['region'] = rng.choice(encodings['regions'], size=len(df))
+    return df
+
+
+def encode_features(df, le_soil, le_season, le_region):
+    """Returns the model's 10-column feature matrix for a dataset frame."""
+    import numpy as np
+
+    return np.column_stack([
+        df[NUMERIC_FEATURES].to_numpy(dtype=float),
+        le_soil.transform(df['soil_type']),
+        le_season.transform(df['season']),
+        le_region.transform(df['region']),
+    ])
+
+
+def build_model_bundle(df=None, model=None):
+    """
+    Fits label encoders and a classifier into a dict shaped like models/crop_model.pkl.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import LabelEncoder
+
+    if df is None:
+        df = load_crop_dataset()
+
+    le_soil = LabelEncoder().fit(df['soil_type'])
+    le_season = LabelEncoder().fit(df['season'])
+    le_region = LabelEncoder().fit(df['region'])
+    le_crop = LabelEncoder().fit(df['label'])
+
+    if model is None:
+        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    model.fit(encode_features(df, le_soil, le_season, le_region), le_crop.transform(df['label']))
+
+    return {
+        'model': model,
+        'le_soil': le_soil,
+        'le_season': le_season,
+        'le_region': le_region,
+        'le_crop': le_crop
+    }
@@ -1,10 +1,26 @@
 import requests
 import os
+import threading
+import time
+from datetime import datetime
+
+from modules.climate import ClimateNormals
 
 class ClimateRiskEngine:
+    # Live readings kept (one per location) before the oldest are dropped
+    MAX_LIVE = 1000
+
     def __init__(self, api_key=None):
         self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
-        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+        self.base_url = os.getenv('OPENWEATHER_URL', "http://api.openweathermap.org/data/2.5/weather")
+        self.timeout = float(os.getenv('OPENWEATHER_TIMEOUT', 3))
+        self.normals = ClimateNormals.load()
+        # Live weather only refines the normals: fetched in the background, used once cached
+        self.live_enabled = bool(self.api_key) and os.getenv('LIVE_WEATHER', '1') != '0'
+        self.live_ttl = float(os.getenv('LIVE_WEATHER_TTL_SECONDS', 1800))
+        self._live = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
 
     def get_weather_data(self, city):
         if not self.api_key:
@@ -15,24 +31,70 @@ class ClimateRiskEngine:
                 'appid': self.api_key,
                 'units': 'metric'
             }
-            response = requests.get(self.base_url, params=params)
+            response = requests.get(self.base_url, params=params, timeout=self.timeout)
             return response.json() if response.status_code == 200 else None
         except Exception as e:
             print(f"Weather API Error: {e}")
             return None
 
-    def calculate_risk_scores(self, city, hist_rainfall, hist_temp):
+    def _refresh_live(self, city):
+        try:
+            weather = self.get_weather_data(city)
+            if weather:
+                with self._lock:
+                    if len(self._live) >= self.MAX_LIVE:
+                        self._live.pop(next(iter(self._live)))
+                    self._live[city] = (time.monotonic(), weather['main']['temp'], weather['main']['humidity'])
+        finally:
+            with self._lock:
+                self._refreshing.discard(city)
+
+    def live_conditions(self, city):
+        """
+        (temp, humidity) from a fresh cached reading, else None. A missing or
+        stale reading is refreshed in the background; the caller never waits.
+        """
+        if not self.live_enabled or not city:
+            return None
+        cached = self._live.get(city)
+        if cached and time.monotonic() - cached[0] < self.live_ttl:
+            return cached[1:]
+        with self._lock:
+            if city in self._refreshing:
+                return None
+            self._refreshing.add(city)
+        from modules.fanout import get_executor
+        get_executor().submit(self._refresh_live, city)
+        return None
+
+    def calculate_risk_scores(self, city, hist_rainfall, hist_temp, region=None, month=None):
         """
-        Calculates drought and flood risk scores (0-100).
+        Calculates drought and flood risk scores (0-100) from the bundled
+        climate normals for the location (or region) and month, refined by a
+        cached live reading when one is available. No network call is made.
         """
-        if not city:
-            weather = None
+        month = month or datetime.now().month
+        normals = self.normals.lookup(city, month, region)
+        live = self.live_conditions(city)
+        if live:
+            temp, humidity = live
+            source = 'live'
+        elif normals:
+            temp, humidity = normals['temp'], normals['humidity']
+            source = 'normals'
         else:
-            weather = self.get_weather_data(city)
-        # Mocking data if API fails for demo purposes
-        temp = weather['main']['temp'] if weather else hist_temp
-        humidity = weather['main']['humidity'] if weather else 50
-        
+            temp, humidity = hist_temp, 50
+            source = 'input'
+        risk = self.score_conditions(temp, humidity, hist_rainfall)
+        risk['source'] = source
+        risk['matched_location'] = normals['matched'] if normals else None
+        return risk
+
+    @staticmethod
+    def score_conditions(temp, humidity, hist_rainfall):
+        """
+        Drought/flood risk (0-100) from known conditions, without any API call.
+        """
         # Drought Risk Logic
         # - High temp, Low rainfall history, Low humidity
         drought_score = (max(0, temp - 25) * 2) + (max(0, 100 - humidity) * 0.5)
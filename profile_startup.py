@@ -0,0 +1,122 @@
+"""
+Cold-start profiler for AgriPredictor-AI.
+
+Reports per-module import time, time to first byte for /health and RSS after boot,
+and exits non-zero when any budget is exceeded.
+
+Usage:
+    python profile_startup.py            # report + enforce budgets
+    python profile_startup.py --top 25   # show more modules
+Budgets can be overridden with STARTUP_BUDGET_IMPORT_MS, STARTUP_BUDGET_HEALTH_MS
+and STARTUP_BUDGET_RSS_MB.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Startup budgets (free-tier instance, single gunicorn worker)
+BUDGETS = {
+    'import_ms': float(os.environ.get('STARTUP_BUDGET_IMPORT_MS', 1500)),
+    'health_ttfb_ms': float(os.environ.get('STARTUP_BUDGET_HEALTH_MS', 250)),
+    'rss_mb': float(os.environ.get('STARTUP_BUDGET_RSS_MB', 150)),
+}
+
+
+def get_rss_mb():
+    """Current resident set size in MB (falls back to peak RSS off Linux)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KB on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def profile_imports():
+    """
+    Imports wsgi in a fresh interpreter with -X importtime.
+    Returns a list of (module, self_ms, cumulative_ms) sorted by cumulative time.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import wsgi'],
+        cwd=BASE_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            _, self_us, cumulative_us, name = [part.strip() for part in line.replace('import time:', '|', 1).split('|')]
+            rows.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+        except ValueError:
+            continue
+    return sorted(rows, key=lambda r: r[2], reverse=True)
+
+
+def profile_boot():
+    """Imports the WSGI app in-process and hits /health once."""
+    sys.path.insert(0, BASE_DIR)
+    os.chdir(BASE_DIR)
+
+    start = time.perf_counter()
+    from wsgi import app
+    import_ms = (time.perf_counter() - start) * 1000
+
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.get('/health')
+    health_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'import_ms': round(import_ms, 1),
+        'health_ttfb_ms': round(health_ms, 1),
+        'health_status': response.status_code,
+        'rss_mb': round(get_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile AgriPredictor-AI cold start")
+    parser.add_argument('--top', type=int, default=15, help="number of slowest imports to show")
+    args = parser.parse_args()
+
+    print("⏳ Profiling imports (python -X importtime)...")
+    imports = profile_imports()
+    print(f"\n{'module':<50} {'self ms':>10} {'cumul ms':>10}")
+    print("-" * 72)
+    for name, self_ms, cumulative_ms in imports[:args.top]:
+        print(f"{name:<50} {self_ms:>10.1f} {cumulative_ms:>10.1f}")
+
+    print("\n⏳ Booting app and requesting /health...")
+    stats = profile_boot()
+
+    failed = False
+    print(f"\n{'metric':<20} {'value':>10} {'budget':>10}")
+    print("-" * 42)
+    for metric, budget in BUDGETS.items():
+        value = stats[metric]
+        status = "✅" if value <= budget else "❌"
+        failed = failed or value > budget
+        print(f"{metric:<20} {value:>10.1f} {budget:>10.1f} {status}")
+
+    if stats['health_status'] != 200:
+        print(f"❌ /health returned {stats['health_status']}")
+        failed = True
+
+    if failed:
+        print("\n❌ Startup budget exceeded")
+        sys.exit(1)
+    print("\n✅ Startup within budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,59 +3,60 @@ Lightweight rule-based crop predictor for cloud deployment
 Works without the 23MB ML model file
 """
 
+# Crop database with requirements
+CROPS_DB = {
+    'Rice': {
+        'n_range': (80, 120), 'p_range': (40, 60), 'k_range': (40, 60),
+        'temp_range': (20, 35), 'rainfall_min': 1000, 'ph_range': (5.5, 7.0),
+        'soils': ['Clayey', 'Loamy'], 'seasons': ['Kharif', 'Monsoon']
+    },
+    'Wheat': {
+        'n_range': (100, 140), 'p_range': (40, 80), 'k_range': (40, 80),
+        'temp_range': (15, 25), 'rainfall_min': 500, 'ph_range': (6.0, 7.5),
+        'soils': ['Loamy', 'Clayey'], 'seasons': ['Rabi', 'Winter']
+    },
+    'Maize': {
+        'n_range': (60, 100), 'p_range': (30, 60), 'k_range': (30, 60),
+        'temp_range': (20, 30), 'rainfall_min': 600, 'ph_range': (5.5, 7.5),
+        'soils': ['Loamy', 'Sandy', 'Black'], 'seasons': ['Kharif', 'Summer']
+    },
+    'Cotton': {
+        'n_range': (80, 120), 'p_range': (40, 80), 'k_range': (40, 80),
+        'temp_range': (21, 35), 'rainfall_min': 600, 'ph_range': (6.0, 8.0),
+        'soils': ['Black', 'Alluvial'], 'seasons': ['Kharif', 'Summer']
+    },
+    'Millets': {
+        'n_range': (40, 80), 'p_range': (20, 40), 'k_range': (20, 40),
+        'temp_range': (25, 35), 'rainfall_min': 300, 'ph_range': (5.0, 7.5),
+        'soils': ['Sandy', 'Red', 'Loamy'], 'seasons': ['Kharif', 'Summer']
+    },
+    'Pulses': {
+        'n_range': (20, 60), 'p_range': (40, 80), 'k_range': (20, 60),
+        'temp_range': (20, 30), 'rainfall_min': 400, 'ph_range': (6.0, 7.5),
+        'soils': ['Loamy', 'Black', 'Red'], 'seasons': ['Rabi', 'Winter']
+    },
+    'Sugarcane': {
+        'n_range': (80, 150), 'p_range': (40, 80), 'k_range': (80, 150),
+        'temp_range': (21, 35), 'rainfall_min': 1000, 'ph_range': (6.0, 7.5),
+        'soils': ['Loamy', 'Black'], 'seasons': ['Whole Year', 'Monsoon']
+    },
+    'Jute': {
+        'n_range': (60, 100), 'p_range': (30, 60), 'k_range': (30, 60),
+        'temp_range': (24, 35), 'rainfall_min': 1200, 'ph_range': (6.0, 7.5),
+        'soils': ['Alluvial', 'Clayey'], 'seasons': ['Kharif', 'Monsoon']
+    },
+}
+
+
 def predict_crops_simple(n, p, k, temperature, humidity, ph, rainfall, soil_type, season, region):
     """
     Simple rule-based prediction when ML model unavailable
     Returns top 3 crops with confidence scores
     """
     
-    # Crop database with requirements
-    crops_db = {
-        'Rice': {
-            'n_range': (80, 120), 'p_range': (40, 60), 'k_range': (40, 60),
-            'temp_range': (20, 35), 'rainfall_min': 1000, 'ph_range': (5.5, 7.0),
-            'soils': ['Clayey', 'Loamy'], 'seasons': ['Kharif', 'Monsoon']
-        },
-        'Wheat': {
-            'n_range': (100, 140), 'p_range': (40, 80), 'k_range': (40, 80),
-            'temp_range': (15, 25), 'rainfall_min': 500, 'ph_range': (6.0, 7.5),
-            'soils': ['Loamy', 'Clayey'], 'seasons': ['Rabi', 'Winter']
-        },
-        'Maize': {
-            'n_range': (60, 100), 'p_range': (30, 60), 'k_range': (30, 60),
-            'temp_range': (20, 30), 'rainfall_min': 600, 'ph_range': (5.5, 7.5),
-            'soils': ['Loamy', 'Sandy', 'Black'], 'seasons': ['Kharif', 'Summer']
-        },
-        'Cotton': {
-            'n_range': (80, 120), 'p_range': (40, 80), 'k_range': (40, 80),
-            'temp_range': (21, 35), 'rainfall_min': 600, 'ph_range': (6.0, 8.0),
-            'soils': ['Black', 'Alluvial'], 'seasons': ['Kharif', 'Summer']
-        },
-        'Millets': {
-            'n_range': (40, 80), 'p_range': (20, 40), 'k_range': (20, 40),
-            'temp_range': (25, 35), 'rainfall_min': 300, 'ph_range': (5.0, 7.5),
-            'soils': ['Sandy', 'Red', 'Loamy'], 'seasons': ['Kharif', 'Summer']
-        },
-        'Pulses': {
-            'n_range': (20, 60), 'p_range': (40, 80), 'k_range': (20, 60),
-            'temp_range': (20, 30), 'rainfall_min': 400, 'ph_range': (6.0, 7.5),
-            'soils': ['Loamy', 'Black', 'Red'], 'seasons': ['Rabi', 'Winter']
-        },
-        'Sugarcane': {
-            'n_range': (80, 150), 'p_range': (40, 80), 'k_range': (80, 150),
-            'temp_range': (21, 35), 'rainfall_min': 1000, 'ph_range': (6.0, 7.5),
-            'soils': ['Loamy', 'Black'], 'seasons': ['Whole Year', 'Monsoon']
-        },
-        'Jute': {
-            'n_range': (60, 100), 'p_range': (30, 60), 'k_range': (30, 60),
-            'temp_range': (24, 35), 'rainfall_min': 1200, 'ph_range': (6.0, 7.5),
-            'soils': ['Alluvial', 'Clayey'], 'seasons': ['Kharif', 'Monsoon']
-        },
-    }
-    
     scores = {}
     
-    for crop, req in crops_db.items():
+    for crop, req in CROPS_DB.items():
         score = 0
         
         # NPK matching (40 points)
@@ -1,14 +1,33 @@
+import os
 import sys
+import threading
 import traceback
 
 print("🚀 Gunicorn: Starting AgriPredictor-AI WSGI Server...")
 try:
-    from app import app
+    from app import app, warm_up, run_retention_schedule, run_aggregation_schedule, memory_manager
     print("✅ Flask app imported successfully")
 except Exception as e:
     print(f"❌ CRITICAL ERROR importing app:")
     print(traceback.format_exc())
     sys.exit(1)
 
+# Boot work (DB schema, catalog, templates) runs in the background so /health answers immediately
+threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+# Idle unloading and memory-pressure eviction (MEMORY_CHECK_INTERVAL=0 disables)
+memory_manager.start()
+
+# Incremental regional cube aggregation (AGGREGATION_INTERVAL_SECONDS=0 disables)
+aggregation_interval = float(os.environ.get('AGGREGATION_INTERVAL_SECONDS', 300))
+if aggregation_interval > 0:
+    threading.Thread(target=run_aggregation_schedule, args=(aggregation_interval,),
+                     name="regional-aggregation", daemon=True).start()
+
+# Optional in-process retention job (otherwise run compact_predictions.py from cron)
+if os.environ.get('RETENTION_INTERVAL_HOURS'):
+    threading.Thread(target=run_retention_schedule, args=(float(os.environ['RETENTION_INTERVAL_HOURS']),),
+                     name="retention", daemon=True).start()
+
 if __name__ == "__main__":
     app.run()